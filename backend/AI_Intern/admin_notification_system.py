@@ -1,10 +1,89 @@
 import os
+import io
 import csv
+import gzip
 import pandas as pd
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.mime.application import MIMEApplication
 from datetime import datetime
+from shortlist_group_invite import ShortlistGroupInvite
+from log_index import CsvLogIndex
+from smtp_session import get_smtp_session
+
+ADMIN_LOG_FIELDS = ['timestamp', 'notification_type', 'admin_email',
+                    'recipient_count', 'status', 'error_message', 'watermark']
+
+# One entry per candidate; positional fields are name, domain, email, phone
+CANDIDATE_HTML_ROW = """
+                    <strong>• Name:</strong> {0} <br>
+                    <strong>• Domain:</strong> {1} <br>
+                    <strong>• Email:</strong> {2} <br>
+                    <strong>• Phone:</strong> {3}<br><br>
+            """
+CANDIDATE_TEXT_ROW = "• {0} - {1}\n"
+
+CANDIDATE_NOTIFICATIONS = {
+    "shortlisted": {
+        "subject": "✅ {count} Candidates Shortlisted - CodeCelix",
+        "html": """
+        <html>
+        <body>
+            <div style="padding: 20px;">
+                <h3>🎉 {count} candidates have been shortlisted!</h3>
+                {part}
+                <div>
+                    <strong>Shortlisted Candidates:</strong><br>
+        {rows}
+                </div>
+            </div>
+        </body>
+        </html>
+        """,
+        "text": """
+CodeCelix Shortlist Notification
+
+🎉 {count} candidates have been shortlisted!
+{part}
+Shortlisted Candidates:
+{rows}
+Total shortlisted: {count}
+These candidates have been invited to the shortlist group automatically.
+
+Generated on: {generated}
+        """
+    },
+    "rejected": {
+        "subject": "❌ {count} Candidates Rejected - CodeCelix",
+        "html": """
+        <html>
+        <body>
+            
+            <div style="padding: 20px;">
+                <h3>{count} candidates have been rejected</h3>
+                {part}
+                <div>
+                    <strong>Rejected Candidates:</strong><br>
+        {rows}
+                </div>
+            </div>
+        </body>
+        </html>
+        """,
+        "text": """
+CodeCelix Rejection Notification
+
+{count} candidates have been rejected
+{part}
+Rejected Candidates:
+{rows}
+Total rejected: {count}
+These candidates have been notified of the decision automatically.
+
+Generated on: {generated}
+        """
+    }
+}
 
 class AdminNotificationSystem:
     def __init__(self):
@@ -19,6 +98,21 @@ class AdminNotificationSystem:
         self.smtp_port = 587
         self.sender_email = ""
         self.sender_password = ""
+        
+        # Notification type -> shortlist log action it reports on
+        self.notification_actions = {"shortlisted": "shortlist", "rejected": "rejection"}
+        # Only report actions newer than the last successful notification of the same type
+        self.incremental_notifications = True
+        # Bytes of the shortlist log covered by the last load_all_candidate_data,
+        # and the fingerprint of the bytes just before that offset
+        self.shortlist_offset = None
+        self.shortlist_fingerprint = ''
+        
+        # Candidate lists that would make an email bigger than this are split into
+        # several emails ("chunks") or sent as a gzipped CSV attachment ("attachment")
+        self.max_email_bytes = 1000000
+        self.large_list_mode = "chunks"
+        self.attachment_preview_rows = 20
 
     def load_all_candidate_data(self):
         """Load and merge all candidate data from different steps"""
@@ -31,9 +125,18 @@ class AdminNotificationSystem:
             print(f"📊 Loaded {len(responses_df)} candidate responses")
             
             # Load shortlist status
+            self.shortlist_offset = None
+            self.shortlist_fingerprint = ''
             if os.path.exists(self.shortlist_log_csv):
-                shortlist_df = pd.read_csv(self.shortlist_log_csv)
-                latest_shortlist = shortlist_df.groupby('email').last().reset_index()
+                shortlist_system = ShortlistGroupInvite()
+                try:
+                    shortlist_index = shortlist_system.load_shortlist_index()
+                    latest_shortlist = shortlist_index.view('shortlist').frame()
+                    # The frame reflects exactly this much of the log, so it can serve as the watermark
+                    self.shortlist_offset = shortlist_index.offset
+                    self.shortlist_fingerprint = shortlist_index.fingerprint
+                finally:
+                    shortlist_system.close_shortlist_index()
                 responses_df = responses_df.merge(
                     latest_shortlist[['email', 'action_type', 'status', 'timestamp']], 
                     on='email', 
@@ -52,16 +155,15 @@ class AdminNotificationSystem:
             print(f"❌ Error loading candidate data: {error}")
             return pd.DataFrame()
 
-    def send_simple_notification(self, subject, html_content, text_content=None):
-        """Send simple email notification to admin"""
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.sender_email
-            msg['To'] = self.admin_email
-            msg['Subject'] = subject
-            
-            if not text_content:
-                text_content = f"""
+    def build_notification(self, subject, html_content, text_content=None, attachments=None):
+        """Build the admin email as a plain text + HTML message
+        
+        attachments is a list of (filename, bytes) pairs.
+        """
+        msg = MIMEMultipart('alternative')
+        
+        if not text_content:
+            text_content = f"""
 CodeCelix Recruitment System Notification
 
 {subject}
@@ -70,193 +172,300 @@ Please check the HTML version for detailed information.
 
 Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
                 """
-            
-            part1 = MIMEText(text_content, 'plain')
-            part2 = MIMEText(html_content, 'html')
-            
-            msg.attach(part1)
-            msg.attach(part2)
-            
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.sender_email, self.sender_password)
-                text = msg.as_string()
-                server.sendmail(self.sender_email, self.admin_email, text)
-            
-            print(f"✅ Admin notification sent successfully")
-            return True, "Email sent successfully"
-            
+        
+        part1 = MIMEText(text_content, 'plain')
+        part2 = MIMEText(html_content, 'html')
+        
+        msg.attach(part1)
+        msg.attach(part2)
+        
+        if attachments:
+            body = msg
+            msg = MIMEMultipart('mixed')
+            msg.attach(body)
+            for filename, content in attachments:
+                attachment = MIMEApplication(content, Name=filename)
+                attachment['Content-Disposition'] = f'attachment; filename="{filename}"'
+                msg.attach(attachment)
+        
+        msg['From'] = self.sender_email
+        msg['To'] = self.admin_email
+        msg['Subject'] = subject
+        return msg
+
+    def smtp_session(self):
+        """Shared logged-in SMTP session for the configured server and sender"""
+        return get_smtp_session(self.smtp_server, self.smtp_port, self.sender_email, self.sender_password)
+
+    def send_batch(self, notifications):
+        """Send (subject, html_content, text_content[, attachments]) notifications over one SMTP session
+        
+        Returns a (success, message) tuple per notification.
+        """
+        try:
+            messages = [(self.admin_email, self.build_notification(*notification)) for notification in notifications]
         except Exception as error:
-            print(f"❌ Failed to send admin notification: {error}")
-            return False, str(error)
+            print(f"❌ Failed to build admin notifications: {error}")
+            return [(False, str(error))] * len(notifications)
+        
+        results = self.smtp_session().send_batch(messages)
+        
+        for success, message in results:
+            if success:
+                print(f"✅ Admin notification sent successfully")
+            else:
+                print(f"❌ Failed to send admin notification: {message}")
+        
+        return results
+
+    def send_simple_notification(self, subject, html_content, text_content=None):
+        """Send simple email notification to admin"""
+        return self.send_batch([(subject, html_content, text_content)])[0]
+
+    def close_smtp_session(self):
+        self.smtp_session().close()
+
+    def migrate_admin_log(self):
+        """Add the watermark column to an admin log written before it existed"""
+        if not os.path.isfile(self.admin_log_csv):
+            return
+        
+        with open(self.admin_log_csv, 'r', newline='', encoding='utf-8') as csvfile:
+            reader = csv.DictReader(csvfile)
+            if reader.fieldnames is None or 'watermark' in reader.fieldnames:
+                return
+            rows = list(reader)
+        
+        temp_path = f"{self.admin_log_csv}.tmp"
+        with open(temp_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=ADMIN_LOG_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(temp_path, self.admin_log_csv)
 
-    def log_admin_notification(self, notification_type, status, recipient_count=0, error_msg=None):
-        """Log admin notification attempt"""
+    def log_admin_notification(self, notification_type, status, recipient_count=0, error_msg=None, watermark=None):
+        """Log admin notification attempt
+        
+        watermark is "<offset>:<fingerprint>" of the shortlist log the notification covered.
+        """
         log_entry = {
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'notification_type': notification_type,
             'admin_email': self.admin_email,
             'recipient_count': recipient_count,
             'status': status,
-            'error_message': error_msg or ''
+            'error_message': error_msg or '',
+            'watermark': '' if watermark is None else watermark
         }
         
+        self.migrate_admin_log()
         file_exists = os.path.isfile(self.admin_log_csv)
         
         with open(self.admin_log_csv, 'a', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['timestamp', 'notification_type', 'admin_email', 
-                         'recipient_count', 'status', 'error_message']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=ADMIN_LOG_FIELDS)
             
             if not file_exists:
                 writer.writeheader()
             
             writer.writerow(log_entry)
 
-    def notify_shortlisted_candidates(self):
-        """Send simple notification for newly shortlisted candidates"""
-        df = self.load_all_candidate_data()
+    def load_watermarks(self):
+        """Watermark of the latest successful notification of each type"""
+        self.migrate_admin_log()
+        if not os.path.isfile(self.admin_log_csv):
+            return {}
         
-        if df.empty:
-            print("📧 No candidate data available")
-            return
+        log_df = pd.read_csv(self.admin_log_csv, dtype=str, keep_default_na=False)
+        sent = log_df[(log_df['status'] == 'Success') & (log_df['watermark'] != '')]
+        return sent.groupby('notification_type')['watermark'].last().to_dict()
+
+    def shortlist_watermark(self):
+        """Watermark for the loaded shortlist log: "<offset>:<fingerprint>" """
+        return f"{self.shortlist_offset}:{self.shortlist_fingerprint}"
+
+    def shortlist_emails_since(self, offset, fingerprint=''):
+        """Emails with a shortlist log row between byte offset and the loaded shortlist_offset"""
+        end = self.shortlist_offset
         
-        shortlisted = df[
-            (df['final_action'] == 'shortlist') & 
-            (df['action_status'] == 'Success')
-        ].copy()
+        with open(self.shortlist_log_csv, 'rb') as f:
+            if offset > end or (fingerprint and CsvLogIndex.read_fingerprint(f, offset) != fingerprint):
+                # The log was rewritten since the watermark was taken
+                offset = 0
+            f.seek(0)
+            header = f.readline()
+            offset = max(offset, len(header))
+            f.seek(offset)
+            chunk = f.read(max(0, end - offset))
         
-        if not shortlisted.empty:
-            subject = f"✅ {len(shortlisted)} Candidates Shortlisted - CodeCelix"
-            
-            html_content = f"""
-            <html>
-            <body>
-                <div style="padding: 20px;">
-                    <h3>🎉 {len(shortlisted)} candidates have been shortlisted!</h3>
-                    
-                    <div>
-                        <strong>Shortlisted Candidates:</strong><br>
-            """
-            
-            for _, candidate in shortlisted.iterrows():
-                html_content += f"""
-                        <strong>• Name:</strong> {candidate.get('name', 'Unknown')} <br>
-                        <strong>• Domain:</strong> {candidate.get('domain', 'Unknown')} <br>
-                        <strong>• Email:</strong> {candidate.get('email', 'Unknown')} <br>
-                        <strong>• Phone:</strong> {candidate.get('phone', 'Unknown')}<br><br>
-                """
-            
-            html_content += """
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            text_content = f"""
-CodeCelix Shortlist Notification
+        rows = pd.read_csv(io.BytesIO(header + chunk), dtype=str, keep_default_na=False)
+        return set(rows['email']) if 'email' in rows.columns else set()
 
-🎉 {len(shortlisted)} candidates have been shortlisted!
+    def filter_new_actions(self, partitions):
+        """Keep only candidates with shortlist log rows written after their type's watermark"""
+        if self.shortlist_offset is None:
+            return partitions
+        
+        watermarks = self.load_watermarks()
+        new_emails = {}
+        for notification_type, candidates in partitions.items():
+            watermark = watermarks.get(notification_type)
+            if not watermark:
+                continue
+            
+            offset, _, fingerprint = watermark.partition(':')
+            if not offset.isdigit():
+                continue
+            
+            key = (int(offset), fingerprint)
+            if key not in new_emails:
+                new_emails[key] = self.shortlist_emails_since(*key)
+            partitions[notification_type] = candidates[candidates['email'].isin(new_emails[key])]
+        return partitions
 
-Shortlisted Candidates:
-"""
-            for _, candidate in shortlisted.iterrows():
-                text_content += f"• {candidate.get('name', 'Unknown')} - {candidate.get('domain', 'Unknown')}\n"
-            
-            text_content += f"""
-Total shortlisted: {len(shortlisted)}
-These candidates have been invited to the shortlist group automatically.
+    def partition_by_action(self, df):
+        """Split successful shortlist actions by notification type with a single groupby"""
+        partitions = {notification_type: df.iloc[0:0] for notification_type in self.notification_actions}
+        if df.empty or 'final_action' not in df.columns:
+            return partitions
+        
+        successful = df[df['action_status'] == 'Success']
+        groups = dict(tuple(successful.groupby('final_action')))
+        for notification_type, action in self.notification_actions.items():
+            if action in groups:
+                partitions[notification_type] = groups[action].copy()
+        return partitions
 
-Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-            """
-            
-            success, message = self.send_simple_notification(subject, html_content, text_content)
-            
-            status = "Success" if success else "Failed"
-            error_msg = None if success else message
-            
-            self.log_admin_notification("shortlisted", status, len(shortlisted), error_msg)
-            
-            if success:
-                print(f"✅ Shortlist notification sent: {len(shortlisted)} candidates")
-            else:
-                print(f"❌ Failed to send shortlist notification: {message}")
-        else:
-            print("📧 No new shortlisted candidates to report")
+    def render_candidate_rows(self, candidates):
+        """HTML and text list entries for every candidate, formatted straight from the column arrays"""
+        columns = [
+            candidates[column].fillna('Unknown').astype(str).tolist() if column in candidates.columns
+            else ['Unknown'] * len(candidates)
+            for column in ('name', 'domain', 'email', 'phone')
+        ]
+        html_rows = list(map(CANDIDATE_HTML_ROW.format, *columns))
+        text_rows = list(map(CANDIDATE_TEXT_ROW.format, columns[0], columns[1]))
+        return html_rows, text_rows
 
-    def notify_rejected_candidates(self):
-        """Send simple notification for rejected candidates"""
-        df = self.load_all_candidate_data()
+    def chunk_rows(self, row_sizes, budget):
+        """(start, end) ranges of consecutive rows whose sizes add up to at most budget bytes"""
+        chunks = []
+        start = 0
+        size = 0
+        for position, row_size in enumerate(row_sizes):
+            if size + row_size > budget and position > start:
+                chunks.append((start, position))
+                start = position
+                size = 0
+            size += row_size
+        chunks.append((start, len(row_sizes)))
+        return chunks
+
+    def candidate_csv_attachment(self, notification_type, candidates):
+        """(filename, gzipped CSV bytes) listing every candidate in the notification"""
+        columns = [column for column in ('name', 'domain', 'email', 'phone', 'action_date') if column in candidates.columns]
+        filename = f"{notification_type}_candidates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv.gz"
+        return filename, gzip.compress(candidates[columns].to_csv(index=False).encode('utf-8'))
+
+    def build_candidate_notifications(self, notification_type, candidates):
+        """(subject, html_content, text_content, attachments) emails for one notification type
+        
+        Small lists give one email. Lists that would exceed max_email_bytes are split
+        into parts, or listed in an attached gzipped CSV when large_list_mode is "attachment".
+        """
+        template = CANDIDATE_NOTIFICATIONS[notification_type]
+        count = len(candidates)
+        generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        subject = template["subject"].format(count=count)
+        html_rows, text_rows = self.render_candidate_rows(candidates)
+        
+        def render(rows_html, rows_text, part=''):
+            html_content = template["html"].format(count=count, part=f"<p>{part}</p>" if part else '', rows=''.join(rows_html))
+            text_content = template["text"].format(count=count, part=part, rows=''.join(rows_text), generated=generated)
+            return html_content, text_content
+        
+        # Non-ASCII bodies are base64 encoded: every 57 bytes become a 76 character line plus newline
+        overhead = sum(len(part.encode('utf-8')) for part in render([], [], 'Part 00 of 00')) + 2048
+        budget = self.max_email_bytes * 57 // 77 - overhead
+        row_sizes = [len(html_row.encode('utf-8')) + len(text_row.encode('utf-8'))
+                     for html_row, text_row in zip(html_rows, text_rows)]
+        
+        if sum(row_sizes) <= budget:
+            return [(subject, *render(html_rows, text_rows), None)]
+        
+        if self.large_list_mode == "attachment":
+            preview = self.attachment_preview_rows
+            attachment = self.candidate_csv_attachment(notification_type, candidates)
+            note = f"Showing {min(preview, count)} of {count}; the full list is attached as {attachment[0]}"
+            return [(subject, *render(html_rows[:preview], text_rows[:preview], note), [attachment])]
+        
+        chunks = self.chunk_rows(row_sizes, budget)
+        notifications = []
+        for number, (start, end) in enumerate(chunks, 1):
+            part = f"Part {number} of {len(chunks)}"
+            notifications.append((f"{subject} ({part})", *render(html_rows[start:end], text_rows[start:end], part), None))
+        return notifications
+
+    def notify_candidates(self, notification_types, df=None):
+        """Send the given notification types from one loaded frame, over one SMTP session
+        
+        Returns {notification_type: (success, message)} for the types that had candidates.
+        """
+        if df is None:
+            df = self.load_all_candidate_data()
         
         if df.empty:
             print("📧 No candidate data available")
-            return
+            return {}
         
-        rejected = df[
-            (df['final_action'] == 'rejection') & 
-            (df['action_status'] == 'Success')
-        ].copy()
+        partitions = self.partition_by_action(df)
+        if self.incremental_notifications:
+            partitions = self.filter_new_actions(partitions)
+        pending = []
+        for notification_type in notification_types:
+            candidates = partitions[notification_type]
+            if candidates.empty:
+                print(f"📧 No new {notification_type} candidates to report")
+            else:
+                pending.append((notification_type, candidates))
         
-        if not rejected.empty:
-            subject = f"❌ {len(rejected)} Candidates Rejected - CodeCelix"
-            
-            html_content = f"""
-            <html>
-            <body>
-                
-                <div style="padding: 20px;">
-                    <h3>{len(rejected)} candidates have been rejected</h3>
-                    
-                    <div>
-                        <strong>Rejected Candidates:</strong><br>
-            """
-            
-            for _, candidate in rejected.iterrows():
-                html_content += f"""
-                        <strong>• Name:</strong> {candidate.get('name', 'Unknown')} <br>
-                        <strong>• Domain:</strong> {candidate.get('domain', 'Unknown')} <br>
-                        <strong>• Email:</strong> {candidate.get('email', 'Unknown')} <br>
-                        <strong>• Phone:</strong> {candidate.get('phone', 'Unknown')}<br><br>
-                """
-            
-            html_content += """
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            text_content = f"""
-CodeCelix Rejection Notification
-
-{len(rejected)} candidates have been rejected
-
-Rejected Candidates:
-"""
-            for _, candidate in rejected.iterrows():
-                text_content += f"• {candidate.get('name', 'Unknown')} - {candidate.get('domain', 'Unknown')}\n"
-            
-            text_content += f"""
-Total rejected: {len(rejected)}
-These candidates have been notified of the decision automatically.
-
-Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-            """
-            
-            success, message = self.send_simple_notification(subject, html_content, text_content)
-            
+        if not pending:
+            return {}
+        
+        built = [self.build_candidate_notifications(ntype, candidates) for ntype, candidates in pending]
+        results = iter(self.send_batch([notification for emails in built for notification in emails]))
+        
+        outcomes = {}
+        for (notification_type, candidates), emails in zip(pending, built):
+            email_results = [next(results) for _ in emails]
+            failures = [message for sent, message in email_results if not sent]
+            success = not failures
+            message = email_results[0][1] if success else "; ".join(failures)
             status = "Success" if success else "Failed"
             error_msg = None if success else message
             
-            self.log_admin_notification("rejected", status, len(rejected), error_msg)
+            watermark = self.shortlist_watermark() if success and self.shortlist_offset is not None else None
+            
+            self.log_admin_notification(notification_type, status, len(candidates), error_msg, watermark)
             
             if success:
-                print(f"✅ Rejection notification sent: {len(rejected)} candidates")
+                print(f"✅ {notification_type.title()} notification sent: {len(candidates)} candidates")
             else:
-                print(f"❌ Failed to send rejection notification: {message}")
-        else:
-            print("📧 No new rejected candidates to report")
+                print(f"❌ Failed to send {notification_type} notification: {message}")
+            outcomes[notification_type] = (success, message)
+        
+        return outcomes
+
+    def notify_shortlisted_candidates(self, df=None):
+        """Send simple notification for newly shortlisted candidates"""
+        return self.notify_candidates(["shortlisted"], df)
+
+    def notify_rejected_candidates(self, df=None):
+        """Send simple notification for rejected candidates"""
+        return self.notify_candidates(["rejected"], df)
+
+    def notify_all(self):
+        """Load candidate data once and send every candidate notification type from it"""
+        return self.notify_candidates(list(self.notification_actions))
 
     def send_test_notification(self):
         """Send a test notification to verify email configuration"""
@@ -378,8 +587,9 @@ if __name__ == "__main__":
     print("3. Send test notification")
     print("4. Send error alert (test)")
     print("5. Show notification statistics")
+    print("6. Send all candidate notifications")
     
-    choice = input("\nEnter your choice (1-5): ")
+    choice = input("\nEnter your choice (1-6): ")
     
     if choice == "1":
         admin_system.notify_shortlisted_candidates()
@@ -391,5 +601,7 @@ if __name__ == "__main__":
         admin_system.send_error_alert("Test error message", "Test Component")
     elif choice == "5":
         admin_system.show_notification_stats()
+    elif choice == "6":
+        admin_system.notify_all()
     else:
         print("Invalid choice. Exiting...")
\ No newline at end of file
@@ -74,6 +74,11 @@ class StreamlitRecruitmentSystem:
             "sender_email": "sender-email",
             "sender_password": "your-app-password",
             "whatsapp_group_link": "https://chat.whatsapp.com/Invite-code",
+            "whatsapp_transport": {
+                "type": "browser",
+                "rate_per_minute": 20,
+                "workers": 1
+            },
             "auto_approve_shortlist": True,
             "auto_send_rejections": True,
             "last_run": "",
@@ -96,6 +101,8 @@ class StreamlitRecruitmentSystem:
             "admin_notification_system.py"
         ]
         
+        self.active_transport_settings = None
+        
         self.load_config()
     
     def create_folder_structure(self):
@@ -152,6 +159,22 @@ class StreamlitRecruitmentSystem:
         
         return missing_files, missing_packages, credentials_missing
     
+    def configure_whatsapp_transport(self):
+        """Point the shared WhatsApp outbound queue at the configured transport"""
+        settings = self.config.get("whatsapp_transport", {})
+        if settings == self.active_transport_settings:
+            return
+        
+        from whatsapp_transport import configure_outbound_queue, create_transport
+        
+        configure_outbound_queue(
+            create_transport(settings),
+            rate_per_minute=settings.get("rate_per_minute"),
+            burst=settings.get("burst", 1),
+            workers=settings.get("workers")
+        )
+        self.active_transport_settings = dict(settings)
+    
     def run_step(self, step_name, script_file, description, progress_bar, status_text):
         """Run a single workflow step"""
         if not self.config["steps_enabled"].get(step_name, True):
@@ -174,6 +197,9 @@ class StreamlitRecruitmentSystem:
             
             spec.loader.exec_module(module)
             
+            if step_name in ("whatsapp_contact", "interview_questions", "shortlist_invites"):
+                self.configure_whatsapp_transport()
+            
             if step_name == "gmail_scan":
                 scanner = module.GmailCVScanner()
                 result = scanner.scan_and_process_cvs()
@@ -206,8 +232,7 @@ class StreamlitRecruitmentSystem:
                 admin.sender_password = self.config["sender_password"]
                 admin.admin_email = self.config["admin_email"]
                 
-                admin.notify_shortlisted_candidates()
-                admin.notify_rejected_candidates()
+                admin.notify_all()
                 
                 result = True
             
@@ -244,8 +269,13 @@ class StreamlitRecruitmentSystem:
                 stats["domains_detected"] = len(df[df['domain'].notna() & (df['domain'] != 'Unknown')])
             
             if os.path.exists("data/whatsapp_contact_log.csv"):
-                df = pd.read_csv("data/whatsapp_contact_log.csv")
-                stats["contacts_made"] = len(df[df['message_sent'] == 'Yes'])
+                from whatsapp_contact_system import WhatsAppContactSystem
+                contact_system = WhatsAppContactSystem()
+                try:
+                    stats["contacts_made"] = int(contact_system.get_contact_rollups()['successes'].sum())
+                finally:
+                    # Streamlit reruns get_stats on every interaction; don't leak a connection each time
+                    contact_system.close_contact_index()
             
             if os.path.exists("data/interview_questions_log.csv"):
                 df = pd.read_csv("data/interview_questions_log.csv")
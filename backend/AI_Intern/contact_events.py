@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import threading
+
+
+class ContactEventStream:
+    """Append-only stream of contact events.
+
+    Every event is appended to a JSON-lines file that listeners in any process
+    tail from a saved byte offset.
+    """
+
+    def __init__(self, event_log="data/contact_events.jsonl"):
+        self.event_log = event_log
+        self.lock = threading.Lock()
+
+    def publish_many(self, event_type, payloads):
+        """Append one event per payload in a single write"""
+        now = time.time()
+        events = [{'type': event_type, 'time': now, 'data': payload} for payload in payloads]
+        if not events:
+            return events
+
+        event_folder = os.path.dirname(self.event_log)
+        if event_folder and not os.path.exists(event_folder):
+            os.makedirs(event_folder)
+
+        with self.lock:
+            with open(self.event_log, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(event, default=str) + '\n' for event in events))
+
+        return events
+
+    def publish(self, event_type, payload):
+        return self.publish_many(event_type, [payload])[0]
+
+    def end_offset(self):
+        return os.path.getsize(self.event_log) if os.path.exists(self.event_log) else 0
+
+    def read_from(self, offset):
+        """Events written after byte ``offset``; returns (events, new_offset)"""
+        entries, new_offset = self.read_entries_from(offset)
+        return [event for _, event in entries], new_offset
+
+    def read_entries_from(self, offset):
+        """Like read_from, but each event comes as (start_offset, event) so a
+        reader can record exactly how far it has handled the log"""
+        if not os.path.exists(self.event_log):
+            return [], 0
+
+        with open(self.event_log, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < offset:
+                # The file was truncated or replaced; start over
+                offset = 0
+            f.seek(offset)
+            chunk = f.read(size - offset)
+
+        # Leave a partially written last line for the next read
+        last_newline = chunk.rfind(b'\n')
+        if last_newline < 0:
+            return [], offset
+        chunk = chunk[:last_newline + 1]
+
+        entries = []
+        start = offset
+        for line in chunk.splitlines(keepends=True):
+            try:
+                entries.append((start, json.loads(line.decode('utf-8'))))
+            except ValueError:
+                pass
+            start += len(line)
+        return entries, offset + len(chunk)
+
+
+_shared_stream = None
+_shared_lock = threading.Lock()
+
+
+def get_event_stream():
+    """Process-wide contact event stream"""
+    global _shared_stream
+    with _shared_lock:
+        if _shared_stream is None:
+            _shared_stream = ContactEventStream()
+        return _shared_stream
@@ -67,6 +67,31 @@ class CVDomainDetector:
             "skills": 10,
             "experience": 12
         }
+        
+        self.compile_keyword_matcher()
+    
+    def compile_keyword_matcher(self):
+        """Precompile every domain's keywords with their score weights (call again after editing them)"""
+        self.keyword_matchers = {}
+        for domain, categories in self.domain_keywords.items():
+            matchers = []
+            for category, keywords in categories.items():
+                category_weight = self.category_weights.get(category, 5)
+                for keyword in keywords:
+                    keyword_importance = len(keyword.split()) * 2
+                    matchers.append((keyword, re.compile(re.escape(keyword.lower())), category_weight * keyword_importance))
+            self.keyword_matchers[domain] = matchers
+    
+    def score_texts_batch(self, texts, domain):
+        """calculate_domain_score for a whole column of texts against one domain's keywords"""
+        texts_lower = texts.fillna('').astype(str).str.lower()
+        scores = pd.Series(0, index=texts.index, dtype='int64')
+        
+        for keyword, pattern, weight in self.keyword_matchers.get(domain, []):
+            frequency_bonus = texts_lower.str.count(pattern).clip(upper=3)
+            scores += weight * frequency_bonus
+        
+        return scores
     
     def read_pdf_cv(self, file_path):
         """Extract text from PDF CV"""
@@ -1,16 +1,27 @@
 import os
 import csv
+import time
+import heapq
+import threading
 import pandas as pd
 from datetime import datetime
 import urllib.parse
-import webbrowser
-import time
+from whatsapp_transport import get_outbound_queue
+from phone_normalizer import get_phone_normalizer
+from whatsapp_contact_system import WhatsAppContactSystem
+from contact_events import get_event_stream
+from response_tracker import tracker_lock
 
 class InterviewQuestionsGenerator:
     def __init__(self):
         self.contact_log_csv = "data/whatsapp_contact_log.csv"
         self.questions_log_csv = "data/interview_questions_log.csv"
         self.responses_csv = "data/candidate_responses.csv"
+        self.phone_normalizer = get_phone_normalizer()
+        
+        # Follow-ups triggered by contact_succeeded events go out this long after the contact
+        self.followup_delay_seconds = 60
+        self.event_offset_file = "data/contact_events.offset"
         
         self.interview_questions = {
             "Web Development": [
@@ -87,6 +98,9 @@ Based on your domain interest, here are some specific technical questions to bet
 Please answer these questions when you have time. This will help us understand your skill level and match you with the right projects! 🚀
 
 Take your time - quality answers are more important than speed. 💪"""
+        
+        self.default_question_domain = "Web Development"
+        self.compile_question_templates()
 
     def load_contacted_candidates(self):
         """Load candidates who have been contacted via WhatsApp"""
@@ -94,54 +108,87 @@ Take your time - quality answers are more important than speed. 💪"""
             print(f"❌ {self.contact_log_csv} not found. Please run WhatsApp contact system first.")
             return pd.DataFrame()
         
-        df = pd.read_csv(self.contact_log_csv)
-        
-        contacted = df[df['message_sent'] == 'Yes'].copy()
-        contacted = contacted.groupby('email').last().reset_index()
+        contact_system = WhatsAppContactSystem()
+        contact_system.set_contact_log(self.contact_log_csv)
+        contacted = contact_system.load_contact_state_index().view('successful_contact').frame()
+        contact_system.close_contact_index()
         
         print(f"📊 Found {len(contacted)} successfully contacted candidates")
         
         return contacted
 
-    def generate_questions_for_domain(self, domain):
-        """Generate interview questions for specific domain"""
-        domain_key = None
+    def compile_question_templates(self):
+        """Prebuild each domain's message body and reset the domain alias map.
+        
+        Call again after changing interview_questions or the intro/outro text.
+        """
+        self.question_blocks = {}
+        for domain_key, questions in self.interview_questions.items():
+            questions_text = "\n\n".join(f"Q{i}: {question}" for i, question in enumerate(questions, 1))
+            self.question_blocks[domain_key] = f"\n\n{self.followup_intro}{questions_text}{self.followup_outro}"
+        
+        # Detected domain string -> template key; unseen strings are resolved once and cached
+        self.domain_aliases = {key.lower(): key for key in self.interview_questions}
+
+    def set_interview_questions(self, interview_questions):
+        """Replace the question sets and recompile the templates"""
+        self.interview_questions = interview_questions
+        self.compile_question_templates()
+
+    def resolve_domain(self, domain):
+        """Template key for a detected domain string"""
+        domain_lower = str(domain).lower()
+        domain_key = self.domain_aliases.get(domain_lower)
+        if domain_key is not None:
+            return domain_key
+        
         for key in self.interview_questions.keys():
-            if key.lower() in domain.lower() or domain.lower() in key.lower():
+            if key.lower() in domain_lower or domain_lower in key.lower():
                 domain_key = key
                 break
         
         if not domain_key:
-            domain_key = "Web Development"
-            print(f"⚠️  Unknown domain '{domain}', using Web Development questions")
+            domain_key = self.default_question_domain
+            print(f"⚠️  Unknown domain '{domain}', using {domain_key} questions")
         
-        questions = self.interview_questions[domain_key]
-        return questions, domain_key
+        self.domain_aliases[domain_lower] = domain_key
+        return domain_key
 
-    def create_followup_message(self, name, domain, questions):
-        """Create personalized follow-up message with interview questions"""
-        questions_text = ""
-        for i, question in enumerate(questions, 1):
-            questions_text += f"Q{i}: {question}\n\n"
-        
-        full_message = f"Hi {name}! 👋\n\n{self.followup_intro}{questions_text.strip()}{self.followup_outro}"
-        return full_message
+    def generate_questions_for_domain(self, domain):
+        """Generate interview questions for specific domain"""
+        domain_key = self.resolve_domain(domain)
+        return self.interview_questions[domain_key], domain_key
+
+    def create_followup_message(self, name, domain_key, questions=None):
+        """Create personalized follow-up message with interview questions
+        
+        Without questions, uses the compiled template of the domain_key returned
+        by resolve_domain; explicit questions are rendered as given.
+        """
+        if questions is None:
+            return f"Hi {name}! 👋{self.question_blocks[domain_key]}"
+        
+        questions_text = "\n\n".join(f"Q{i}: {question}" for i, question in enumerate(questions, 1))
+        return f"Hi {name}! 👋\n\n{self.followup_intro}{questions_text}{self.followup_outro}"
+
+    def render_followup_messages(self, df):
+        """Matched domain and personalized message for every row, in one pass"""
+        domains = df['domain'].fillna('Unknown').astype(str)
+        matched = domains.map({domain: self.resolve_domain(domain) for domain in domains.unique()})
+        names = df['name'].fillna('Candidate').astype(str)
+        
+        messages = "Hi " + names + "! 👋" + matched.map(self.question_blocks)
+        return pd.DataFrame({'matched_domain': matched, 'message': messages}, index=df.index)
 
     def send_whatsapp_automatically(self, phone, message):
-        """Automatically send WhatsApp message"""
-        try:
-            encoded_message = urllib.parse.quote(message, safe='')
-            whatsapp_url = f"https://web.whatsapp.com/send?phone={phone}&text={encoded_message}"
-            
-            webbrowser.open(whatsapp_url)
-            
-            time.sleep(2)
-            
+        """Send WhatsApp message through the shared rate-limited outbound queue"""
+        outbound = get_outbound_queue()
+        success, result = outbound.send(phone, message)
+        
+        if success and outbound.transport.name == 'browser':
             print(f"✅ WhatsApp web opened for follow-up questions")
-            return True, "WhatsApp web opened successfully"
-            
-        except Exception as error:
-            return False, f"Failed to open WhatsApp: {error}"
+        
+        return success, result
 
     def log_questions_sent(self, candidate_data, questions, method, status, link=None, error_msg=None):
         """Log interview questions sent to candidate"""
@@ -188,11 +235,14 @@ Take your time - quality answers are more important than speed. 💪"""
             print(f"❌ Error checking questions history: {e}")
             return False
 
-    def send_followup_questions(self, candidate_data, method='auto'):
-        """Send follow-up interview questions to a candidate"""
+    def send_followup_questions(self, candidate_data, method='auto', rendered=None):
+        """Send follow-up interview questions to a candidate
+        
+        rendered is an optional (matched_domain, message) pair from render_followup_messages.
+        """
         name = candidate_data.get('name', 'Candidate')
         domain = candidate_data.get('domain', 'Unknown')
-        phone = candidate_data.get('phone', 'Not found')
+        phone = self.phone_normalizer.normalize(candidate_data.get('phone'))
         email = candidate_data.get('email', '')
         
         print(f"\n📋 Processing: {name} ({email})")
@@ -202,17 +252,20 @@ Take your time - quality answers are more important than speed. 💪"""
             print(f"⏭️ Questions already sent, skipping...")
             return True, "Questions already sent"
         
-        questions, matched_domain = self.generate_questions_for_domain(domain)
+        if rendered is not None:
+            matched_domain, followup_message = rendered
+            questions = self.interview_questions[matched_domain]
+        else:
+            questions, matched_domain = self.generate_questions_for_domain(domain)
+            followup_message = self.create_followup_message(name, matched_domain)
         
         if matched_domain != domain:
             print(f"📝 Using {matched_domain} questions (closest match)")
         
-        followup_message = self.create_followup_message(name, matched_domain, questions)
-        
-        print(f"📱 Phone: {phone}")
+        print(f"📱 Phone: {phone or 'Not found'}")
         print(f"❓ Questions to send: {len(questions)}")
         
-        if phone == 'Not found' or not phone:
+        if not phone:
             print("❌ No phone number available for this candidate")
             self.log_questions_sent(candidate_data, questions, method, "No phone found", 
                                   error_msg="No phone number available")
@@ -267,21 +320,24 @@ Take your time - quality answers are more important than speed. 💪"""
         failed_count = 0
         skipped_count = 0
         
+        rendered = self.render_followup_messages(df)
+        
         for index, row in df.iterrows():
             candidate_data = row.to_dict()
             
             print(f"\n{'='*70}")
             print(f"📋 Candidate {index + 1}/{len(df)}")
             
-            success, result = self.send_followup_questions(candidate_data, method=method)
+            success, result = self.send_followup_questions(
+                candidate_data, method=method,
+                rendered=(rendered.at[index, 'matched_domain'], rendered.at[index, 'message'])
+            )
             
             if success:
                 if result == "Questions already sent":
                     skipped_count += 1
                 else:
                     questions_sent_count += 1
-                    if method == 'auto':
-                        time.sleep(3)
             else:
                 failed_count += 1
         
@@ -293,6 +349,86 @@ Take your time - quality answers are more important than speed. 💪"""
         
         self.create_response_tracker()
 
+    def send_scheduled_followup(self, candidate_data):
+        """Send one candidate's follow-up from the event listener and track it"""
+        try:
+            success, result = self.send_followup_questions(candidate_data, method='auto')
+            if success and result != "Questions already sent":
+                self.create_response_tracker()
+            return success, result
+        except Exception as e:
+            print(f"❌ Error sending scheduled follow-up: {e}")
+            return False, str(e)
+
+    def run_followup_loop(self, fetch_events, delay_seconds, stop_event, poll_interval=1.0, save_position=None):
+        """Schedule a follow-up for every contact_succeeded event and send each when due.
+        
+        fetch_events(timeout) returns (marker, event) pairs that arrived within timeout
+        seconds. After every change save_position(markers) gets the markers of the
+        events whose follow-up is still waiting.
+        """
+        pending = []
+        sequence = 0
+        
+        while not stop_event.is_set():
+            timeout = poll_interval
+            if pending:
+                timeout = min(timeout, max(0.0, pending[0][0] - time.time()))
+            
+            changed = False
+            for marker, event in fetch_events(timeout):
+                changed = True
+                if event.get('type') != 'contact_succeeded':
+                    continue
+                due = event.get('time', time.time()) + delay_seconds
+                heapq.heappush(pending, (due, sequence, marker, event['data']))
+                sequence += 1
+            
+            while pending and pending[0][0] <= time.time():
+                _, _, _, candidate_data = heapq.heappop(pending)
+                self.send_scheduled_followup(candidate_data)
+                changed = True
+            
+            if changed and save_position is not None:
+                save_position([marker for _, _, marker, _ in pending])
+        
+        return len(pending)
+
+    def listen_for_contacts(self, delay_seconds=None, poll_interval=1.0, stop_event=None):
+        """Tail the contact event file and follow up on contacts made by any process.
+        
+        Blocks until stop_event is set (or Ctrl+C). The saved read position never
+        passes an event whose follow-up is still waiting, so a restart picks those
+        up again; follow-ups that did go out are skipped as already sent.
+        """
+        delay_seconds = self.followup_delay_seconds if delay_seconds is None else delay_seconds
+        stream = get_event_stream()
+        stop_event = stop_event or threading.Event()
+        
+        offset = stream.end_offset()
+        if os.path.exists(self.event_offset_file):
+            with open(self.event_offset_file, 'r') as f:
+                offset = int(f.read().strip() or 0)
+        position = {'read': offset, 'saved': offset}
+        
+        def fetch_events(timeout):
+            time.sleep(timeout)
+            entries, position['read'] = stream.read_entries_from(position['read'])
+            return entries
+        
+        def save_position(pending_offsets):
+            offset = min(pending_offsets) if pending_offsets else position['read']
+            if offset != position['saved']:
+                with open(self.event_offset_file, 'w') as f:
+                    f.write(str(offset))
+                position['saved'] = offset
+        
+        print(f"👂 Watching {stream.event_log} for new contacts (follow-up after {delay_seconds}s)")
+        try:
+            self.run_followup_loop(fetch_events, delay_seconds, stop_event, poll_interval, save_position)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopped listening")
+
     def create_response_tracker(self):
         """Create a template for tracking candidate responses"""
         if not os.path.exists(self.questions_log_csv):
@@ -306,43 +442,47 @@ Take your time - quality answers are more important than speed. 💪"""
             print("❌ No successful question sends found")
             return
         
-        existing_responses = pd.DataFrame()
-        if os.path.exists(self.responses_csv):
-            existing_responses = pd.read_csv(self.responses_csv)
-        
-        response_data = []
-        for _, row in successful_questions.iterrows():
-            if not existing_responses.empty and row['email'] in existing_responses['email'].values:
-                continue
-                
-            response_entry = {
-                'name': row['name'],
-                'email': row['email'],
-                'domain': row['domain'],
-                'phone': row['phone'],
-                'questions_sent_date': row['timestamp'],
+        # Checked and appended under the lock other tracker writers hold
+        with tracker_lock(self.responses_csv):
+            tracker_exists = os.path.exists(self.responses_csv) and os.path.getsize(self.responses_csv) > 0
+            existing_emails = pd.Series(dtype=object)
+            if tracker_exists:
+                existing_emails = pd.read_csv(self.responses_csv, usecols=['email'])['email']
+            
+            # Anti-join on email: first successful send per candidate not yet tracked
+            new_questions = successful_questions.drop_duplicates('email')
+            new_questions = new_questions[~new_questions['email'].isin(existing_emails)]
+            
+            if new_questions.empty:
+                print("✅ All candidates already in response tracker")
+                return
+            
+            new_responses_df = pd.DataFrame({
+                'name': new_questions['name'],
+                'email': new_questions['email'],
+                'domain': new_questions['domain'],
+                'phone': new_questions['phone'],
+                'questions_sent_date': new_questions['timestamp'],
                 'response_received': 'No',
                 'response_date': '',
                 'response_quality': '',
                 'technical_score': '',
                 'notes': '',
                 'next_step': ''
-            }
-            response_data.append(response_entry)
-        
-        if response_data:
-            new_responses_df = pd.DataFrame(response_data)
+            })
             
-            if not existing_responses.empty:
-                combined_df = pd.concat([existing_responses, new_responses_df], ignore_index=True)
+            if tracker_exists:
+                # Append in the tracker's own column order instead of rewriting the file
+                with open(self.responses_csv, 'r', newline='', encoding='utf-8') as f:
+                    header = next(csv.reader(f))
+                new_responses_df.reindex(columns=header).to_csv(
+                    self.responses_csv, mode='a', header=False, index=False
+                )
             else:
-                combined_df = new_responses_df
-            
-            combined_df.to_csv(self.responses_csv, index=False)
-            print(f"📋 Updated response tracker: {self.responses_csv}")
-            print(f"👥 Added {len(response_data)} new candidates to track")
-        else:
-            print("✅ All candidates already in response tracker")
+                new_responses_df.to_csv(self.responses_csv, index=False)
+        
+        print(f"📋 Updated response tracker: {self.responses_csv}")
+        print(f"👥 Added {len(new_responses_df)} new candidates to track")
 
     def show_questions_stats(self):
         """Show interview questions statistics"""
@@ -361,4 +501,32 @@ Take your time - quality answers are more important than speed. 💪"""
         success_rate = (len(df[df['status'] == 'Success']) / len(df)) * 100 if len(df) > 0 else 0
         print(f"Success rate: {success_rate:.1f}%")
         
-        print("\n🎯 Questions Sent by Domain:")
\ No newline at end of file
+        print("\n🎯 Questions Sent by Domain:")
+
+if __name__ == "__main__":
+    questions_system = InterviewQuestionsGenerator()
+    
+    print("🚀 Interview Questions Generator")
+    print("Choose an option:")
+    print("1. Send follow-up questions to all contacted candidates")
+    print("2. Listen for new contacts and follow up automatically")
+    print("3. Create/update response tracker")
+    print("4. Show questions statistics")
+    
+    choice = input("\nEnter your choice (1-4): ")
+    
+    if choice == "1":
+        questions_system.send_questions_to_all_contacted(method='auto')
+    
+    elif choice == "2":
+        delay = input(f"Follow-up delay in seconds (default {questions_system.followup_delay_seconds}): ").strip()
+        questions_system.listen_for_contacts(delay_seconds=int(delay) if delay else None)
+    
+    elif choice == "3":
+        questions_system.create_response_tracker()
+    
+    elif choice == "4":
+        questions_system.show_questions_stats()
+    
+    else:
+        print("Invalid choice. Exiting...")
@@ -0,0 +1,470 @@
+import os
+import io
+import csv
+import json
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+
+class SuccessKeysView:
+    """Set of keys (e.g. email) that have at least one successful log row.
+
+    The set is read from the store on the first lookup rather than when the
+    index opens, so callers that only need other views never pay for it.
+    """
+
+    def __init__(self, name, key_columns, status_column='status', success_value='Success'):
+        self.name = name
+        self.key_columns = tuple(key_columns)
+        self.status_column = status_column
+        self.success_value = success_value
+        self.table = f"success_keys_{name}"
+        self.conn = None
+        self.keys = None
+
+    def setup(self, conn):
+        columns = ", ".join(f"k{i} TEXT NOT NULL" for i in range(len(self.key_columns)))
+        primary = ", ".join(f"k{i}" for i in range(len(self.key_columns)))
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({columns}, PRIMARY KEY ({primary}))")
+
+    def clear(self, conn):
+        conn.execute(f"DELETE FROM {self.table}")
+        self.keys = set()
+
+    def load(self, conn):
+        self.conn = conn
+        self.keys = None
+
+    def loaded_keys(self):
+        if self.keys is None:
+            self.keys = set(self.conn.execute(f"SELECT * FROM {self.table}").fetchall())
+        return self.keys
+
+    def apply(self, conn, rows):
+        new_keys = set()
+        for row in rows:
+            if row.get(self.status_column) != self.success_value:
+                continue
+            key = tuple(row.get(column, '') for column in self.key_columns)
+            if self.keys is None or key not in self.keys:
+                new_keys.add(key)
+
+        if new_keys:
+            if self.keys is not None:
+                self.keys.update(new_keys)
+            placeholders = ", ".join("?" for _ in self.key_columns)
+            conn.executemany(f"INSERT OR IGNORE INTO {self.table} VALUES ({placeholders})", new_keys)
+
+    def contains(self, *key):
+        return tuple(key) in self.loaded_keys()
+
+
+class RollupView:
+    """Per-group attempt/success counters and failure reasons, updated as rows arrive"""
+
+    def __init__(self, name, group_column, success_column, success_value, reason_column):
+        self.name = name
+        self.group_column = group_column
+        self.success_column = success_column
+        self.success_value = success_value
+        self.reason_column = reason_column
+        self.table = f"rollup_{name}"
+        self.reasons_table = f"rollup_{name}_reasons"
+        self.groups = {}
+        self.reasons = {}
+
+    def setup(self, conn):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                group_key TEXT PRIMARY KEY, attempts INTEGER NOT NULL, successes INTEGER NOT NULL
+            )
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.reasons_table} (
+                group_key TEXT NOT NULL, reason TEXT NOT NULL, count INTEGER NOT NULL,
+                PRIMARY KEY (group_key, reason)
+            )
+        """)
+
+    def clear(self, conn):
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.execute(f"DELETE FROM {self.reasons_table}")
+        self.groups = {}
+        self.reasons = {}
+
+    def load(self, conn):
+        self.groups = {
+            group: [attempts, successes]
+            for group, attempts, successes in conn.execute(f"SELECT * FROM {self.table}")
+        }
+        self.reasons = {
+            (group, reason): count
+            for group, reason, count in conn.execute(f"SELECT * FROM {self.reasons_table}")
+        }
+
+    def apply(self, conn, rows):
+        group_deltas = {}
+        reason_deltas = {}
+        for row in rows:
+            group = row.get(self.group_column, '')
+            delta = group_deltas.setdefault(group, [0, 0])
+            delta[0] += 1
+            if row.get(self.success_column) == self.success_value:
+                delta[1] += 1
+            elif row.get(self.reason_column):
+                key = (group, row[self.reason_column])
+                reason_deltas[key] = reason_deltas.get(key, 0) + 1
+
+        for group, (attempts, successes) in group_deltas.items():
+            totals = self.groups.setdefault(group, [0, 0])
+            totals[0] += attempts
+            totals[1] += successes
+        for key, count in reason_deltas.items():
+            self.reasons[key] = self.reasons.get(key, 0) + count
+
+        conn.executemany(f"""
+            INSERT INTO {self.table} (group_key, attempts, successes) VALUES (?, ?, ?)
+            ON CONFLICT(group_key) DO UPDATE SET
+                attempts = attempts + excluded.attempts, successes = successes + excluded.successes
+        """, [(group, attempts, successes) for group, (attempts, successes) in group_deltas.items()])
+        conn.executemany(f"""
+            INSERT INTO {self.reasons_table} (group_key, reason, count) VALUES (?, ?, ?)
+            ON CONFLICT(group_key, reason) DO UPDATE SET count = count + excluded.count
+        """, [(group, reason, count) for (group, reason), count in reason_deltas.items()])
+
+    def totals(self):
+        """(attempts, successes) summed over every group"""
+        attempts = sum(values[0] for values in self.groups.values())
+        successes = sum(values[1] for values in self.groups.values())
+        return attempts, successes
+
+    def reason_counts(self):
+        """Failure reason -> count summed over every group, most common first"""
+        counts = {}
+        for (group, reason), count in self.reasons.items():
+            counts[reason] = counts.get(reason, 0) + count
+        return sorted(counts.items(), key=lambda item: item[1], reverse=True)
+
+
+class LatestStateView:
+    """Latest state per key, the same as groupby(key).last() over the log.
+
+    Each column keeps its last non-empty value, so a later row with a blank
+    field does not erase what an earlier row recorded. Rows can be limited
+    to those where ``filter_column`` equals ``filter_value``. States stay in
+    the store and are read per lookup, so opening the index costs nothing.
+    """
+
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, name, key_column='email', filter_column=None, filter_value=None):
+        self.name = name
+        self.key_column = key_column
+        self.filter_column = filter_column
+        self.filter_value = filter_value
+        self.table = f"latest_{name}"
+        self.columns_table = f"latest_{name}_columns"
+        self.conn = None
+        self.columns = []
+
+    def setup(self, conn):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, state TEXT NOT NULL)")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.columns_table} (position INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+
+    def clear(self, conn):
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.execute(f"DELETE FROM {self.columns_table}")
+        self.columns = []
+
+    def load(self, conn):
+        self.conn = conn
+        self.columns = [name for (name,) in conn.execute(f"SELECT name FROM {self.columns_table} ORDER BY position")]
+
+    def _fetch(self, conn, keys):
+        states = {}
+        for start in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[start:start + self.LOOKUP_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            for key, state in conn.execute(f"SELECT key, state FROM {self.table} WHERE key IN ({placeholders})", chunk):
+                states[key] = json.loads(state)
+        return states
+
+    def apply(self, conn, rows):
+        matching = [
+            row for row in rows
+            if (not self.filter_column or row.get(self.filter_column) == self.filter_value)
+            and row.get(self.key_column, '')
+        ]
+        if not matching:
+            return
+
+        known_columns = set(self.columns)
+        new_columns = []
+        for row in matching:
+            for column in row:
+                if column not in known_columns:
+                    known_columns.add(column)
+                    new_columns.append(column)
+
+        changed = self._fetch(conn, list({row[self.key_column] for row in matching}))
+        for row in matching:
+            state = changed.setdefault(row[self.key_column], {})
+            state.update((column, value) for column, value in row.items() if value != '')
+
+        if new_columns:
+            conn.executemany(
+                f"INSERT INTO {self.columns_table} (position, name) VALUES (?, ?)",
+                [(len(self.columns) + i, column) for i, column in enumerate(new_columns)]
+            )
+            self.columns.extend(new_columns)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {self.table} (key, state) VALUES (?, ?)",
+            [(key, json.dumps(state)) for key, state in changed.items()]
+        )
+
+    def get(self, key):
+        row = self.conn.execute(f"SELECT state FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def items(self):
+        """(key, state) for every key, in key order"""
+        for key, state in self.conn.execute(f"SELECT key, state FROM {self.table} ORDER BY key"):
+            yield key, json.loads(state)
+
+    def frame(self):
+        """DataFrame with one row per key, sorted by key like groupby().last().reset_index()"""
+        columns = [self.key_column] + [column for column in self.columns if column != self.key_column]
+        records = [state for _, state in self.items()]
+        return pd.DataFrame.from_records(records, columns=columns)
+
+
+class LatestValueView:
+    """Last non-empty value of one column per key, kept in memory for fast bulk reads"""
+
+    def __init__(self, name, key_column, value_column):
+        self.name = name
+        self.key_column = key_column
+        self.value_column = value_column
+        self.table = f"latest_value_{name}"
+        self.values = {}
+
+    def setup(self, conn):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def clear(self, conn):
+        conn.execute(f"DELETE FROM {self.table}")
+        self.values = {}
+
+    def load(self, conn):
+        self.values = dict(conn.execute(f"SELECT key, value FROM {self.table}").fetchall())
+
+    def apply(self, conn, rows):
+        changed = {}
+        for row in rows:
+            key = row.get(self.key_column, '')
+            value = row.get(self.value_column, '')
+            if key and value != '':
+                changed[key] = value
+
+        if changed:
+            self.values.update(changed)
+            conn.executemany(f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", changed.items())
+
+
+class CsvLogIndex:
+    """SQLite index over an append-only CSV log, kept in sync incrementally.
+
+    The index remembers how many bytes of the log it has consumed, so a sync
+    only parses rows appended since the last one. If the log was rewritten
+    (truncated or edited before the consumed offset) the views are rebuilt.
+    With ``db_path=None`` the index lives in memory for the current process.
+    """
+
+    FINGERPRINT_BYTES = 512
+
+    def __init__(self, log_csv, db_path=None, views=()):
+        self.log_csv = log_csv
+        self.db_path = db_path
+        self.views = list(views)
+        self.lock = threading.RLock()
+        self.conn = None
+        self.offset = 0
+        self.header = None
+        self.fingerprint = ''
+
+    def view(self, name):
+        for view in self.views:
+            if view.name == name:
+                return view
+        raise KeyError(name)
+
+    def open(self):
+        """Open the store and create the tables of every view"""
+        with self.lock:
+            if self.conn is not None:
+                return self.conn
+
+            if self.db_path:
+                db_folder = os.path.dirname(self.db_path)
+                if db_folder and not os.path.exists(db_folder):
+                    os.makedirs(db_folder)
+
+            self.conn = sqlite3.connect(self.db_path or ":memory:", check_same_thread=False)
+            if self.db_path:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)")
+            for view in self.views:
+                view.setup(self.conn)
+
+            # A view added since the store was built has never seen the old rows
+            if self._read_meta().get('views') != self._view_names():
+                self.conn.execute("BEGIN IMMEDIATE")
+                for view in self.views:
+                    view.clear(self.conn)
+                self._save_meta(0, None, '')
+                self.conn.commit()
+
+            self._load_state()
+            return self.conn
+
+    @contextmanager
+    def transaction(self):
+        """Direct access to the store for view updates that don't come from the log"""
+        with self.lock:
+            self.open()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                self._load_state()
+                raise
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def _view_names(self):
+        return ",".join(sorted(view.name for view in self.views))
+
+    @classmethod
+    def read_fingerprint(cls, handle, end):
+        """Hash of the bytes just before ``end``; changes if the log is rewritten up to there"""
+        start = max(0, end - cls.FINGERPRINT_BYTES)
+        handle.seek(start)
+        return hashlib.sha1(handle.read(end - start)).hexdigest()
+
+    def _read_meta(self):
+        return dict(self.conn.execute("SELECT key, value FROM index_meta").fetchall())
+
+    def _load_state(self, meta=None):
+        """Read the consumed offset and every view's state back from the store"""
+        meta = self._read_meta() if meta is None else meta
+        self.offset = int(meta.get('offset', 0))
+        self.header = json.loads(meta['header']) if meta.get('header') else None
+        self.fingerprint = meta.get('fingerprint', '')
+        for view in self.views:
+            view.load(self.conn)
+
+    def sync(self):
+        """Apply log rows appended since the last sync; returns the number of new rows"""
+        with self.lock:
+            self.open()
+            return self._sync_store(reset=False)
+
+    def rebuild(self):
+        """Drop every view and re-index the whole log"""
+        with self.lock:
+            self.open()
+            return self._sync_store(reset=True)
+
+    def _sync_store(self, reset):
+        """Catch the store up with the log inside one write transaction.
+
+        Several index instances (and processes) can share a store, so the
+        consumed offset is re-read under the write lock: if another instance
+        has moved it, the views are reloaded instead of replaying its rows.
+        On any error the store is rolled back and the views reloaded from it.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            meta = self._read_meta()
+            if int(meta.get('offset', 0)) != self.offset or meta.get('fingerprint', '') != self.fingerprint:
+                self._load_state(meta)
+
+            offset, header, fingerprint = self.offset, self.header, self.fingerprint
+            if reset:
+                for view in self.views:
+                    view.clear(self.conn)
+                offset, header, fingerprint = 0, None, ''
+
+            count, offset, header, fingerprint = self._apply_new_rows(offset, header, fingerprint)
+            self._save_meta(offset, header, fingerprint)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            self._load_state()
+            raise
+
+        self.offset, self.header, self.fingerprint = offset, header, fingerprint
+        return count
+
+    def _apply_new_rows(self, offset, header, fingerprint):
+        """Apply complete rows after ``offset``; returns (count, offset, header, fingerprint)"""
+        if not os.path.exists(self.log_csv):
+            if offset:
+                for view in self.views:
+                    view.clear(self.conn)
+            return 0, 0, None, ''
+
+        with open(self.log_csv, 'rb') as handle:
+            size = os.fstat(handle.fileno()).st_size
+
+            if size < offset or (offset and self.read_fingerprint(handle, offset) != fingerprint):
+                print(f"🔄 {self.log_csv} was rewritten, rebuilding index")
+                for view in self.views:
+                    view.clear(self.conn)
+                offset, header, fingerprint = 0, None, ''
+
+            if size == offset:
+                return 0, offset, header, fingerprint
+
+            handle.seek(offset)
+            chunk = handle.read(size - offset)
+
+            # Only consume complete lines; a partially written row is picked up next time
+            last_newline = chunk.rfind(b'\n')
+            if last_newline < 0:
+                return 0, offset, header, fingerprint
+            chunk = chunk[:last_newline + 1]
+
+            reader = csv.reader(io.StringIO(chunk.decode('utf-8'), newline=''))
+            rows = []
+            for values in reader:
+                if header is None:
+                    header = values
+                    continue
+                rows.append(dict(zip(header, values)))
+
+            for view in self.views:
+                view.apply(self.conn, rows)
+
+            offset += len(chunk)
+            return len(rows), offset, header, self.read_fingerprint(handle, offset)
+
+    def _save_meta(self, offset, header, fingerprint):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)",
+            [
+                ('offset', str(offset)),
+                ('header', json.dumps(header) if header else ''),
+                ('fingerprint', fingerprint),
+                ('views', self._view_names()),
+            ]
+        )
@@ -0,0 +1,167 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class MessageOutbox:
+    """Durable SQLite (WAL) outbox for candidate messages.
+
+    Every message is keyed by email + message type + template version, so
+    queueing the same message twice is a no-op. A message moves through
+    queued -> sending -> sent/failed; a row left in 'sending' by a crash is
+    marked failed on the next run rather than sent again, because we cannot
+    know whether it was delivered. Failed messages are resent by the retry
+    schedule, which requeues them.
+    """
+
+    STATES = ('queued', 'sending', 'sent', 'failed')
+
+    def __init__(self, db_path="data/message_outbox.db"):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+
+        db_folder = os.path.dirname(db_path)
+        if db_folder and not os.path.exists(db_folder):
+            os.makedirs(db_folder)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                idempotency_key TEXT PRIMARY KEY,
+                email TEXT NOT NULL,
+                message_type TEXT NOT NULL,
+                template_version TEXT NOT NULL,
+                phone TEXT,
+                message TEXT,
+                candidate_json TEXT,
+                state TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_state ON outbox (message_type, state)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(email, message_type, template_version):
+        return f"{str(email).strip().lower()}|{message_type}|{template_version}"
+
+    def _now(self):
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def enqueue_many(self, messages, message_type, template_version):
+        """Queue (candidate_data, phone, message) tuples; returns how many were new"""
+        now = self._now()
+        rows = []
+        for candidate_data, phone, message in messages:
+            email = candidate_data.get('email', '')
+            rows.append((
+                self.make_key(email, message_type, template_version), email, message_type,
+                str(template_version), phone, message, json.dumps(candidate_data, default=str), now, now
+            ))
+
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO outbox (idempotency_key, email, message_type, template_version,
+                                              phone, message, candidate_json, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def states(self, message_type, template_version):
+        """Map of email -> state for one message type and template version"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT email, state FROM outbox WHERE message_type = ? AND template_version = ?",
+                (message_type, str(template_version))
+            ).fetchall()
+        return {email: state for email, state in rows}
+
+    def recover_interrupted(self, message_type=None):
+        """Mark messages stuck in 'sending' by a crashed run as failed.
+
+        Returns them as (key, candidate_data, phone, reason) so the caller can
+        log the failures and let the retry schedule pick them up.
+        """
+        reason = "Interrupted during send; delivery unknown"
+        query = "SELECT idempotency_key, candidate_json, phone FROM outbox WHERE state = 'sending'"
+        params = []
+        if message_type:
+            query += " AND message_type = ?"
+            params.append(message_type)
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+            self.conn.executemany(
+                "UPDATE outbox SET state = 'failed', result = ?, updated_at = ? WHERE idempotency_key = ? AND state = 'sending'",
+                [(reason, self._now(), key) for key, _, _ in rows]
+            )
+            self.conn.commit()
+        return [(key, json.loads(candidate_json), phone, reason) for key, candidate_json, phone in rows]
+
+    def queued(self, message_type):
+        """Queued messages as (key, candidate_data, phone, message), oldest first"""
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT idempotency_key, candidate_json, phone, message FROM outbox
+                WHERE message_type = ? AND state = 'queued' ORDER BY created_at, rowid
+            """, (message_type,)).fetchall()
+        return [(key, json.loads(candidate_json), phone, message) for key, candidate_json, phone, message in rows]
+
+    def claim(self, key):
+        """Move a queued message to 'sending'; False if another sender already has it"""
+        with self.lock:
+            claimed = self.conn.execute("""
+                UPDATE outbox SET state = 'sending', attempts = attempts + 1, updated_at = ?
+                WHERE idempotency_key = ? AND state = 'queued'
+            """, (self._now(), key)).rowcount
+            self.conn.commit()
+        return claimed == 1
+
+    def _finish(self, key, state, result):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET state = ?, result = ?, updated_at = ? WHERE idempotency_key = ?",
+                (state, str(result), self._now(), key)
+            )
+            self.conn.commit()
+
+    def mark_sent(self, key, result=''):
+        self._finish(key, 'sent', result)
+
+    def mark_failed(self, key, error=''):
+        self._finish(key, 'failed', error)
+
+    def requeue(self, key):
+        """Put a failed message back in the queue (used by retries); False if it wasn't failed"""
+        with self.lock:
+            requeued = self.conn.execute(
+                "UPDATE outbox SET state = 'queued', updated_at = ? WHERE idempotency_key = ? AND state = 'failed'",
+                (self._now(), key)
+            ).rowcount
+            self.conn.commit()
+        return requeued == 1
+
+    def counts(self, message_type=None):
+        """Number of messages per state"""
+        query = "SELECT state, COUNT(*) FROM outbox"
+        params = []
+        if message_type:
+            query += " WHERE message_type = ?"
+            params.append(message_type)
+        query += " GROUP BY state"
+
+        with self.lock:
+            return dict(self.conn.execute(query, params).fetchall())
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,117 @@
+import re
+import threading
+from functools import lru_cache
+import pandas as pd
+
+DEFAULT_COUNTRY_RULES = {
+    "PK": {"code": "92", "trunk_prefix": "0", "national_lengths": [10]},
+    "IT": {"code": "39", "trunk_prefix": "", "national_lengths": [9, 10, 11]},
+    "IN": {"code": "91", "trunk_prefix": "0", "national_lengths": [10]},
+    "AE": {"code": "971", "trunk_prefix": "0", "national_lengths": [9]},
+    "SA": {"code": "966", "trunk_prefix": "0", "national_lengths": [9]},
+    "GB": {"code": "44", "trunk_prefix": "0", "national_lengths": [10]},
+    "US": {"code": "1", "trunk_prefix": "", "national_lengths": [10]},
+}
+
+NON_DIGITS = re.compile(r'\D')
+
+
+class PhoneNormalizer:
+    """Normalizes raw phone numbers to WhatsApp's international digits-only form.
+
+    Numbers written with + or 00 followed by a known country number are kept
+    in that country; numbers in the default country's national format get its
+    country code. Anything else with at least ``min_length`` digits is passed
+    through unchanged, as format_phone_number always did. Results are cached
+    per raw input.
+    """
+
+    def __init__(self, country_rules=None, default_country="PK", min_length=10, cache_size=65536):
+        self.country_rules = country_rules or DEFAULT_COUNTRY_RULES
+        self.default_country = default_country
+        self.default_rule = self.country_rules[default_country]
+        self.min_length = min_length
+
+        codes = sorted({rule["code"] for rule in self.country_rules.values()}, key=len, reverse=True)
+        self.code_pattern = re.compile(r'^(' + '|'.join(codes) + r')')
+        self.rules_by_code = {}
+        for country, rule in self.country_rules.items():
+            self.rules_by_code.setdefault(rule["code"], []).append((country, rule))
+
+        self._normalize_cached = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _to_text(self, raw):
+        if raw is None or (isinstance(raw, float) and pd.isna(raw)):
+            return ''
+        if isinstance(raw, float) and raw.is_integer():
+            # Phone columns read without dtype=str come back as floats
+            return str(int(raw))
+        return str(raw).strip()
+
+    def _normalize(self, text):
+        if not text or text == 'Not found':
+            return None
+
+        digits = NON_DIGITS.sub('', text)
+        # + and 00 mark an international number only if a known country number follows
+        if text.startswith('+') and self.country_of(digits):
+            return digits
+        if digits.startswith('00') and self.country_of(digits[2:]):
+            return digits[2:]
+
+        rule = self.default_rule
+        trunk = rule["trunk_prefix"]
+        if trunk and digits.startswith(trunk) and len(digits) - len(trunk) in rule["national_lengths"]:
+            return rule["code"] + digits[len(trunk):]
+        if len(digits) in rule["national_lengths"] and not digits.startswith(rule["code"]):
+            return rule["code"] + digits
+
+        if len(digits) >= self.min_length:
+            return digits
+        return None
+
+    def normalize(self, raw):
+        """Normalize one raw phone value; returns the digits or None"""
+        return self._normalize_cached(self._to_text(raw))
+
+    def normalize_series(self, series):
+        """Normalize a whole column, computing each distinct value once"""
+        text = series.map(self._to_text)
+        mapping = {value: self._normalize_cached(value) for value in text.unique()}
+        return text.map(mapping)
+
+    def country_of(self, phone):
+        """Country of a normalized number, or None if no rule matches its code and length"""
+        match = self.code_pattern.match(phone or '')
+        if not match:
+            return None
+
+        national_length = len(phone) - len(match.group(1))
+        for country, rule in self.rules_by_code.get(match.group(1), []):
+            if national_length in rule["national_lengths"]:
+                return country
+        return None
+
+    def cache_info(self):
+        return self._normalize_cached.cache_info()
+
+
+_shared_normalizer = None
+_shared_lock = threading.Lock()
+
+
+def get_phone_normalizer():
+    """Process-wide normalizer shared by the contact, interview and shortlist modules"""
+    global _shared_normalizer
+    with _shared_lock:
+        if _shared_normalizer is None:
+            _shared_normalizer = PhoneNormalizer()
+        return _shared_normalizer
+
+
+def configure_phone_normalizer(country_rules=None, default_country="PK", min_length=10):
+    """Replace the shared normalizer, e.g. to add countries or change the default"""
+    global _shared_normalizer
+    with _shared_lock:
+        _shared_normalizer = PhoneNormalizer(country_rules, default_country, min_length)
+        return _shared_normalizer
@@ -0,0 +1,205 @@
+import os
+import csv
+import hmac
+import hashlib
+import threading
+from datetime import datetime
+import pandas as pd
+from phone_normalizer import get_phone_normalizer
+from whatsapp_contact_system import WhatsAppContactSystem
+from response_tracker import tracker_lock, write_tracker
+
+REPLY_LOG_FIELDS = ['timestamp', 'phone', 'email', 'message', 'matched']
+
+
+class CandidateReplyIngestor:
+    """Matches inbound WhatsApp replies to candidates and records them in the response tracker.
+
+    Phones are matched through a normalized phone -> email map built from the
+    tracker and the contact log's latest-state view; it is rebuilt only when
+    either of them changes. Each tracker update re-reads the file under the
+    cross-process tracker lock and writes it with an atomic file replace.
+    """
+
+    def __init__(self, responses_csv="data/candidate_responses.csv",
+                 replies_log_csv="data/candidate_replies_log.csv"):
+        self.responses_csv = responses_csv
+        self.replies_log_csv = replies_log_csv
+        self.phone_normalizer = get_phone_normalizer()
+        self.contact_system = WhatsAppContactSystem()
+        self.lock = threading.Lock()
+
+        self.tracker_df = None
+        self.tracker_signature = None
+        self.tracker_rows = {}
+        self.contact_offset = None
+        self.phone_index = {}
+        
+        # Cloud API app secret for X-Hub-Signature-256, or a shared secret that a
+        # local sender puts in X-Webhook-Secret; with neither set, every reply is refused
+        self.app_secret = os.getenv("WHATSAPP_APP_SECRET", "")
+        self.shared_secret = os.getenv("REPLY_WEBHOOK_SECRET", "")
+
+    def verify_request(self, body, headers):
+        """True if the raw request body is signed with the app secret or carries the shared secret"""
+        signature = headers.get("X-Hub-Signature-256", "")
+        if self.app_secret and signature.startswith("sha256="):
+            expected = hmac.new(self.app_secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+            if hmac.compare_digest(signature[len("sha256="):], expected):
+                return True
+        
+        secret = headers.get("X-Webhook-Secret", "")
+        if self.shared_secret and secret:
+            return hmac.compare_digest(secret.encode('utf-8'), self.shared_secret.encode('utf-8'))
+        
+        return False
+
+    def _signature(self):
+        stat = os.stat(self.responses_csv)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load_tracker(self):
+        """Re-read the tracker only if it changed on disk since the last read"""
+        if not os.path.exists(self.responses_csv):
+            self.tracker_df = None
+            self.tracker_signature = None
+            return None
+
+        signature = self._signature()
+        if signature != self.tracker_signature:
+            self.tracker_df = pd.read_csv(self.responses_csv, dtype=str, keep_default_na=False)
+            self.tracker_signature = signature
+            self.tracker_rows = {email: position for position, email in enumerate(self.tracker_df['email'])}
+            self.contact_offset = None
+
+        return self.tracker_df
+
+    def refresh_phone_index(self):
+        """Rebuild the phone -> email map if the tracker or the contact log changed"""
+        contact_index = self.contact_system.load_contact_state_index()
+        if contact_index.offset == self.contact_offset:
+            return self.phone_index
+
+        phone_index = {}
+        for email, state in contact_index.view('contact').items():
+            phone = self.phone_normalizer.normalize(state.get('phone'))
+            if phone:
+                phone_index[phone] = email
+
+        # The tracker's own phone column wins over older contact log entries
+        if self.tracker_df is not None and 'phone' in self.tracker_df.columns:
+            phones = self.phone_normalizer.normalize_series(self.tracker_df['phone'])
+            for phone, email in zip(phones, self.tracker_df['email']):
+                if isinstance(phone, str):
+                    phone_index[phone] = email
+
+        self.phone_index = phone_index
+        self.contact_offset = contact_index.offset
+        return phone_index
+
+    @staticmethod
+    def parse_replies(payload):
+        """Extract (phone, text, timestamp) from a WhatsApp Cloud API webhook or a simple JSON payload.
+
+        Simple payloads look like {"phone": ..., "message": ..., "timestamp": ...}
+        or a list of those.
+        """
+        replies = []
+
+        if isinstance(payload, list):
+            for item in payload:
+                replies.extend(CandidateReplyIngestor.parse_replies(item))
+            return replies
+
+        if not isinstance(payload, dict):
+            return replies
+
+        if 'entry' in payload:
+            for entry in payload.get('entry', []):
+                for change in entry.get('changes', []):
+                    for message in change.get('value', {}).get('messages', []):
+                        text = message.get('text', {}).get('body', '')
+                        if text:
+                            replies.append((message.get('from', ''), text, message.get('timestamp')))
+            return replies
+
+        text = payload.get('message') or payload.get('text') or ''
+        if text:
+            replies.append((payload.get('phone') or payload.get('from', ''), text, payload.get('timestamp')))
+        return replies
+
+    def _format_timestamp(self, timestamp):
+        if timestamp:
+            try:
+                return datetime.fromtimestamp(int(timestamp)).strftime("%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError):
+                return str(timestamp)
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def ingest(self, replies):
+        """Record (phone, text, timestamp) replies; returns (matched_count, unmatched_phones)"""
+        log_entries = []
+        unmatched = []
+
+        # The tracker is re-read under the lock, so writes from other processes aren't lost
+        with self.lock, tracker_lock(self.responses_csv):
+            tracker_df = self.load_tracker()
+            self.refresh_phone_index()
+            updated = False
+
+            if tracker_df is not None:
+                for column in ('response_received', 'response_date', 'response_text'):
+                    if column not in tracker_df.columns:
+                        tracker_df[column] = ''
+
+            for phone, text, timestamp in replies:
+                normalized = self.phone_normalizer.normalize(phone)
+                email = self.phone_index.get(normalized) if normalized else None
+                position = self.tracker_rows.get(email) if tracker_df is not None else None
+                received_at = self._format_timestamp(timestamp)
+
+                if position is None:
+                    unmatched.append(phone)
+                else:
+                    previous = tracker_df.iat[position, tracker_df.columns.get_loc('response_text')]
+                    tracker_df.iat[position, tracker_df.columns.get_loc('response_text')] = \
+                        f"{previous}\n{text}" if previous else text
+                    tracker_df.iat[position, tracker_df.columns.get_loc('response_received')] = 'Yes'
+                    tracker_df.iat[position, tracker_df.columns.get_loc('response_date')] = received_at
+                    updated = True
+
+                log_entries.append({
+                    'timestamp': received_at,
+                    'phone': normalized or phone,
+                    'email': email or '',
+                    'message': text,
+                    'matched': 'Yes' if position is not None else 'No'
+                })
+
+            if updated:
+                write_tracker(self.responses_csv, tracker_df)
+                self.tracker_signature = self._signature()
+
+            self.log_replies(log_entries)
+
+        matched = len(log_entries) - len(unmatched)
+        if matched:
+            print(f"📥 Recorded {matched} candidate replies")
+        if unmatched:
+            print(f"⚠️ {len(unmatched)} replies from unknown numbers")
+        return matched, unmatched
+
+    def log_replies(self, log_entries):
+        """Append every inbound reply, matched or not, to the replies log"""
+        if not log_entries:
+            return
+
+        file_exists = os.path.isfile(self.replies_log_csv)
+
+        with open(self.replies_log_csv, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=REPLY_LOG_FIELDS)
+
+            if not file_exists:
+                writer.writeheader()
+
+            writer.writerows(log_entries)
@@ -0,0 +1,112 @@
+import os
+import re
+import pandas as pd
+from cv_domain_detector import CVDomainDetector
+from interview_questions_generator import InterviewQuestionsGenerator
+from response_tracker import save_tracker_columns
+
+QUESTION_STOPWORDS = {
+    'what', 'which', 'have', 'with', 'your', 'used', 'using', 'like', 'about', 'know', 'does', 'this',
+    'that', 'some', 'share', 'worked', 'familiar', 'understand', 'experience', 'projects', 'made',
+    'from', 'into', 'them', 'they', 'their', 'etc', 'any', 'you', 'how', 'are', 'the', 'and', 'for'
+}
+
+# Tracker columns written by the scorer
+SCORE_COLUMNS = ['technical_score', 'response_quality', 'auto_scored']
+
+
+class ResponseScorer:
+    """Scores candidates' reply text so auto-evaluation doesn't wait for manual review.
+
+    A reply is rated on the domain's CV keyword vocabulary (weighted the same
+    way CVDomainDetector scores CVs), on how many of the terms from the
+    domain's interview questions it mentions, and on its length. Scores are
+    written only for rows that have reply text and no technical_score yet.
+    """
+
+    def __init__(self, responses_csv="data/candidate_responses.csv"):
+        self.responses_csv = responses_csv
+        self.domain_detector = CVDomainDetector()
+        self.questions = InterviewQuestionsGenerator()
+
+        # Keyword score that counts as full marks for the vocabulary component
+        self.keyword_full_score = 150
+        self.min_words = 30
+        self.weights = {"keywords": 0.6, "question_terms": 0.3, "length": 0.1}
+        # Lowest technical_score for each quality label, best first
+        self.quality_thresholds = [("excellent", 8), ("good", 6), ("average", 3), ("poor", 0)]
+
+        self.compile_question_terms()
+
+    def compile_question_terms(self):
+        """Distinct content words of each domain's interview questions"""
+        self.question_terms = {}
+        for domain, questions in self.questions.interview_questions.items():
+            words = re.findall(r"[a-z][a-z0-9+#.-]{2,}", " ".join(questions).lower())
+            terms = sorted({word.strip('.-') for word in words} - QUESTION_STOPWORDS)
+            self.question_terms[domain] = [re.compile(re.escape(term)) for term in terms if term]
+
+    def score_texts(self, texts, domain):
+        """(technical_score, response_quality) Series for replies in one question domain"""
+        texts_lower = texts.fillna('').astype(str).str.lower()
+
+        keyword_score = self.domain_detector.score_texts_batch(texts_lower, domain)
+        keyword_part = (keyword_score / self.keyword_full_score).clip(upper=1.0)
+
+        terms = self.question_terms.get(domain, [])
+        if terms:
+            hits = sum(texts_lower.str.contains(term).astype(int) for term in terms)
+            question_part = (hits / len(terms) * 3).clip(upper=1.0)
+        else:
+            question_part = pd.Series(0.0, index=texts.index)
+
+        word_counts = texts_lower.str.split().str.len().fillna(0)
+        length_part = (word_counts / self.min_words).clip(upper=1.0)
+
+        combined = (self.weights["keywords"] * keyword_part +
+                    self.weights["question_terms"] * question_part +
+                    self.weights["length"] * length_part)
+        scores = (combined * 10).round().astype(int)
+
+        quality = pd.Series(self.quality_thresholds[-1][0], index=texts.index)
+        for label, threshold in reversed(self.quality_thresholds[:-1]):
+            quality = quality.mask(scores >= threshold, label)
+
+        return scores, quality
+
+    def score_pending_responses(self, df=None):
+        """Score every tracker row with reply text but no technical_score; returns how many were scored"""
+        save = df is None
+        if df is None:
+            if not os.path.exists(self.responses_csv):
+                print(f"❌ {self.responses_csv} not found")
+                return 0
+            df = pd.read_csv(self.responses_csv, dtype=str, keep_default_na=False)
+
+        if 'response_text' not in df.columns:
+            return 0
+
+        for column in ('technical_score', 'response_quality', 'auto_scored'):
+            df[column] = df[column].astype(object) if column in df.columns else ''
+
+        reply_text = df['response_text'].fillna('').astype(str).str.strip()
+        technical_score = df['technical_score'].fillna('').astype(str).str.strip()
+        pending = (reply_text != '') & (technical_score == '')
+        if not pending.any():
+            return 0
+
+        pending_df = df[pending]
+        domains = pending_df['domain'].fillna('Unknown').astype(str)
+        question_domains = domains.map({domain: self.questions.resolve_domain(domain) for domain in domains.unique()})
+
+        for domain, rows in pending_df.groupby(question_domains):
+            scores, quality = self.score_texts(rows['response_text'], domain)
+            df.loc[rows.index, 'technical_score'] = scores.astype(str)
+            df.loc[rows.index, 'response_quality'] = quality
+            df.loc[rows.index, 'auto_scored'] = 'Yes'
+
+        if save:
+            save_tracker_columns(self.responses_csv, df, SCORE_COLUMNS)
+
+        print(f"🧮 Auto-scored {int(pending.sum())} candidate replies")
+        return int(pending.sum())
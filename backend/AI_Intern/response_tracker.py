@@ -0,0 +1,73 @@
+import os
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows; writers are then only serialized within one process
+    fcntl = None
+
+_locks = {}
+_held = {}
+_locks_guard = threading.Lock()
+
+
+@contextmanager
+def tracker_lock(responses_csv):
+    """Exclusive lock on the response tracker, shared by every process that writes it.
+
+    Re-entrant within a thread. Backed by flock on "<tracker>.lock".
+    """
+    path = os.path.abspath(responses_csv)
+    with _locks_guard:
+        lock = _locks.setdefault(path, threading.RLock())
+
+    with lock:
+        _held[path] = _held.get(path, 0) + 1
+        handle = None
+        try:
+            if _held[path] == 1 and fcntl is not None:
+                handle = open(f"{path}.lock", 'a')
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+        finally:
+            _held[path] -= 1
+            if handle is not None:
+                # Closing the file releases the flock
+                handle.close()
+
+
+def write_tracker(responses_csv, df):
+    """Atomically replace the tracker with df; call with tracker_lock held"""
+    temp_path = f"{responses_csv}.tmp"
+    df.to_csv(temp_path, index=False)
+    os.replace(temp_path, responses_csv)
+
+
+def save_tracker_columns(responses_csv, df, columns):
+    """Write the given columns of df into the tracker by email, leaving the rest as it is on disk.
+
+    df may have been read before another process (the reply webhook, the
+    follow-up listener) changed the tracker, so only the columns this writer
+    owns are taken from it.
+    """
+    with tracker_lock(responses_csv):
+        if not os.path.exists(responses_csv):
+            write_tracker(responses_csv, df)
+            return
+
+        current = pd.read_csv(responses_csv, dtype=str, keep_default_na=False)
+        updates = df.drop_duplicates('email', keep='last').set_index('email')
+        rows = current['email'].isin(updates.index)
+
+        for column in columns:
+            if column not in updates.columns:
+                continue
+            if column not in current.columns:
+                current[column] = ''
+            current[column] = current[column].astype(object)
+            current.loc[rows, column] = current.loc[rows, 'email'].map(updates[column]).values
+
+        write_tracker(responses_csv, current)
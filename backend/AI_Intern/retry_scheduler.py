@@ -0,0 +1,145 @@
+import heapq
+import time
+from datetime import datetime
+
+
+class ContactRetryScheduler:
+    """Per-candidate retry schedule derived from the contact log.
+
+    Registered as a view on the contact log index, so every failed attempt
+    that gets logged updates the candidate's attempt count and next due time.
+    Failures are classified and each class has its own policy: candidates
+    without a phone number are never retried, transport errors back off
+    exponentially up to a maximum number of attempts.
+    """
+
+    name = "retry"
+    table = "contact_retry_state"
+
+    def __init__(self, policies=None):
+        self.policies = policies or {
+            "no_phone": None,
+            "transport": {"base_delay_minutes": 15, "max_delay_minutes": 24 * 60, "max_attempts": 6},
+            "other": {"base_delay_minutes": 60, "max_delay_minutes": 24 * 60, "max_attempts": 3},
+        }
+        self.entries = {}
+        self.heap = []
+
+    def classify(self, status, error_message=''):
+        """Map a log row's status to a failure class"""
+        if status == 'No phone found':
+            return "no_phone"
+        if status == 'Failed':
+            return "transport"
+        return "other"
+
+    def next_attempt_time(self, failure_class, attempts, last_attempt):
+        """Epoch seconds when the candidate is next due, or None if it should not be retried"""
+        policy = self.policies.get(failure_class)
+        if not policy or attempts >= policy["max_attempts"]:
+            return None
+
+        delay = min(policy["base_delay_minutes"] * 2 ** (attempts - 1), policy["max_delay_minutes"])
+        return last_attempt + delay * 60
+
+    def setup(self, conn):
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                email TEXT PRIMARY KEY,
+                attempts INTEGER NOT NULL,
+                failure_class TEXT NOT NULL,
+                last_error TEXT,
+                next_attempt REAL
+            )
+        """)
+
+    def clear(self, conn):
+        conn.execute(f"DELETE FROM {self.table}")
+        self.entries = {}
+        self.heap = []
+
+    def load(self, conn):
+        self.entries = {}
+        for email, attempts, failure_class, last_error, next_attempt in conn.execute(
+                f"SELECT email, attempts, failure_class, last_error, next_attempt FROM {self.table}"):
+            self.entries[email] = (attempts, failure_class, last_error, next_attempt)
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self.heap = [(entry[3], email) for email, entry in self.entries.items() if entry[3] is not None]
+        heapq.heapify(self.heap)
+
+    def apply(self, conn, rows):
+        changed = {}
+        for row in rows:
+            email = row.get('email', '')
+            if not email:
+                continue
+
+            if row.get('status') == 'Success':
+                self.entries.pop(email, None)
+                changed[email] = None
+                continue
+
+            try:
+                last_attempt = datetime.strptime(row.get('timestamp', ''), "%Y-%m-%d %H:%M:%S").timestamp()
+            except ValueError:
+                last_attempt = time.time()
+
+            attempts = self.entries.get(email, (0,))[0] + 1
+            failure_class = self.classify(row.get('status', ''), row.get('error_message', ''))
+            next_attempt = self.next_attempt_time(failure_class, attempts, last_attempt)
+
+            entry = (attempts, failure_class, row.get('error_message', ''), next_attempt)
+            self.entries[email] = entry
+            changed[email] = entry
+            if next_attempt is not None:
+                heapq.heappush(self.heap, (next_attempt, email))
+
+        removed = [(email,) for email, entry in changed.items() if entry is None]
+        updated = [(email,) + entry for email, entry in changed.items() if entry is not None]
+        if removed:
+            conn.executemany(f"DELETE FROM {self.table} WHERE email = ?", removed)
+        if updated:
+            conn.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?)", updated)
+
+    def resolve(self, conn, email):
+        """Drop a candidate from the schedule (e.g. it turned out to be contacted already)"""
+        self.entries.pop(email, None)
+        conn.execute(f"DELETE FROM {self.table} WHERE email = ?", (email,))
+
+    def due(self, now=None):
+        """Pop and return the emails whose next attempt time has passed"""
+        now = time.time() if now is None else now
+        emails = []
+
+        while self.heap and self.heap[0][0] <= now:
+            next_attempt, email = heapq.heappop(self.heap)
+            entry = self.entries.get(email)
+            # Skip heap entries superseded by a later failure or a success
+            if entry is None or entry[3] != next_attempt:
+                continue
+            emails.append(email)
+
+        return emails
+
+    def next_due(self):
+        """Earliest upcoming attempt time, or None if nothing is scheduled"""
+        while self.heap:
+            next_attempt, email = self.heap[0]
+            entry = self.entries.get(email)
+            if entry is not None and entry[3] == next_attempt:
+                return next_attempt
+            heapq.heappop(self.heap)
+        return None
+
+    def summary(self):
+        """Count of scheduled candidates per failure class, and how many were given up on"""
+        scheduled = {}
+        given_up = 0
+        for attempts, failure_class, last_error, next_attempt in self.entries.values():
+            if next_attempt is None:
+                given_up += 1
+            else:
+                scheduled[failure_class] = scheduled.get(failure_class, 0) + 1
+        return scheduled, given_up
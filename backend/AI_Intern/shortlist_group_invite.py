@@ -1,16 +1,85 @@
 import os
 import csv
+import time
+import heapq
+import threading
+import numpy as np
 import pandas as pd
 import urllib.parse
-import webbrowser
 from datetime import datetime
-import time
+from whatsapp_transport import get_outbound_queue
+from phone_normalizer import get_phone_normalizer
+from log_index import CsvLogIndex, SuccessKeysView, LatestStateView, LatestValueView
+from response_tracker import save_tracker_columns
 import requests
 
+SHORTLIST_LOG_FIELDS = ['timestamp', 'name', 'email', 'domain', 'phone',
+                        'action_type', 'status', 'whatsapp_link', 'group_link', 'error_message']
+
+# Tracker columns written by evaluation and ranking; everything else is left to
+# the other tracker writers (reply webhook, follow-up listener)
+EVALUATION_COLUMNS = ['phone', 'response_quality', 'technical_score', 'auto_scored', 'next_step', 'notes']
+
+_contact_phones = {}
+_contact_phones_lock = threading.Lock()
+
+
+def get_contact_phones(contact_log_csv="data/whatsapp_contact_log.csv"):
+    """email -> latest phone from the contact log, shared by every caller in the process.
+    
+    Backed by its own small index store next to the log (<log>_phones.db), so a
+    new process loads the stored map and a changed log only parses the rows
+    appended since the last sync; None if there is no log.
+    """
+    if not os.path.exists(contact_log_csv):
+        return None
+    
+    stat = os.stat(contact_log_csv)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    
+    with _contact_phones_lock:
+        cached = _contact_phones.get(contact_log_csv)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        
+        index = cached[2] if cached is not None else \
+            CsvLogIndex(contact_log_csv, os.path.splitext(contact_log_csv)[0] + "_phones.db",
+                        views=[LatestValueView('phone', 'email', 'phone')])
+        index.sync()
+        phones = pd.Series(index.view('phone').values, dtype=object)
+        
+        _contact_phones[contact_log_csv] = (signature, phones, index)
+        return phones
+
+
 class ShortlistGroupInvite:
     def __init__(self):
         self.responses_csv = "data/candidate_responses.csv"
         self.shortlist_log_csv = "data/shortlist_invites_log.csv"
+        self.shortlist_index_db = "data/shortlist_invites_index.db"
+        self.shortlist_index = None
+        self.dry_run_report_csv = "data/shortlist_dry_run_report.csv"
+        # Score reply text automatically before evaluating (see response_scorer.py)
+        self.auto_score_responses = True
+        
+        # Evaluation rules, first match wins; quality values are compared lower-cased
+        self.evaluation_rules = [
+            {"next_step": "Reject", "note": "Auto-rejected",
+             "quality_in": ["poor"], "score_at_most": 5, "combine": "any"},
+            {"next_step": "Shortlist", "note": "Auto-approved",
+             "quality_in": ["good", "excellent"], "score_above": 5},
+            {"next_step": "Shortlist", "note": "Auto-approved (default)",
+             "quality_not_in": ["poor"], "score_not": 0},
+        ]
+        self.default_next_step = "More Questions"
+        
+        # Ranking mode: shortlist only the best K per domain, waitlist the rest
+        self.ranking_mode = False
+        self.domain_capacity = {}
+        self.default_domain_capacity = None
+        self.quality_points = {"excellent": 3, "good": 2, "average": 1, "poor": 0}
+        self.ranking_weights = {"technical_score": 1.0, "quality": 1.0}
+        self.phone_normalizer = get_phone_normalizer()
         
         self.whatsapp_group_link = "https://chat.whatsapp.com/Hdn5sbDM3Uz2WYfSBKMILv?mode=ac_t"
         
@@ -50,81 +119,193 @@ CodeCelix Team"""
         
         responses_df = pd.read_csv(self.responses_csv)
         
-        contact_log_file = "data/whatsapp_contact_log.csv"
-        if os.path.exists(contact_log_file):
-            contact_df = pd.read_csv(contact_log_file)
-            latest_contacts = contact_df.groupby('email').last().reset_index()
-            responses_df = responses_df.merge(
-                latest_contacts[['email', 'phone']], 
-                on='email', 
-                how='left',
-                suffixes=('', '_contact')
-            )
-            responses_df['phone'] = responses_df['phone_contact'].fillna(responses_df.get('phone', ''))
-            responses_df = responses_df.drop(columns=['phone_contact'], errors='ignore')
+        contact_phones = get_contact_phones()
+        if contact_phones is not None:
+            phone_contact = responses_df['email'].map(contact_phones)
+            if 'phone' in responses_df.columns:
+                responses_df['phone'] = phone_contact.fillna(responses_df['phone'])
+            else:
+                responses_df['phone'] = phone_contact
         
         print(f"📊 Loaded {len(responses_df)} candidate responses with phone numbers")
         return responses_df
     
     
 
-    def auto_evaluate_candidates(self):
-         """Automatically evaluate candidates based on response quality and technical score"""
-         df = self.load_candidate_responses()
-
-         if df.empty:
-             return df
-
-    # 🔥 Ensure string dtype for next_step and notes
-         
-         #df["next_step"] = df["next_step"].astype(str)
-
+    def load_shortlist_index(self):
+        """Index over the shortlist log, caught up with rows appended since the last load"""
+        if self.shortlist_index is None:
+            self.shortlist_index = CsvLogIndex(
+                self.shortlist_log_csv,
+                self.shortlist_index_db,
+                views=[
+                    SuccessKeysView('processed', ['email', 'action_type']),
+                    LatestStateView('shortlist', 'email')
+                ]
+            )
         
-         #df["notes"] = df["notes"].astype(str)
-
-         updated_count = 0
-
-         for index, row in df.iterrows():
-              if pd.notna(row['next_step']) and row['next_step'].strip() == '':
-                 print("masla")
-                 continue
-
-              response_quality = str(row.get('response_quality', '')).strip()
-              technical_score = row.get('technical_score', '')
-
-              try:
-                 score = int(float(technical_score)) if technical_score != '' else 0
-              except (ValueError, TypeError):
-                  score = 0
-
-              if response_quality.lower() == 'poor' or score <= 5:
-                   df.at[index, 'next_step'] = "Reject"
-                   df.at[index, 'notes'] += f" [Auto-rejected: Quality={response_quality}, Score={score}]"
-                   print(f"❌ Auto-rejected: {row['name']} (Quality: {response_quality}, Score: {score})")
-
-              elif response_quality.lower() in ['good', 'excellent'] and score > 5:
-                  df.at[index, 'next_step'] = "Shortlist"
-                  df.at[index, 'notes'] += f" [Auto-approved: Quality={response_quality}, Score={score}]"
-                  print(f"✅ Auto-shortlisted: {row['name']} (Quality: {response_quality}, Score: {score})")
-
-              else:
-                  if response_quality.lower() != 'poor' and score != 0:
-                      df.at[index, 'next_step'] = "Shortlist"
-                      df.at[index, 'notes'] += f" [Auto-approved (default): Quality={response_quality}, Score={score}]"
-                      print(f"✅ Auto-shortlisted (default): {row['name']} (Quality: {response_quality}, Score: {score})")
-                  else:
-                      df.at[index, 'next_step'] = "More Questions"
-                      print(f"❓ Needs review: {row['name']} (Quality: {response_quality}, Score: {score})")
-
-              updated_count += 1
-
-         df.to_csv(self.responses_csv, index=False)
-         print(f"\n💾 Auto-evaluated {updated_count} candidates")
-         
+        try:
+            self.shortlist_index.sync()
+        except Exception as e:
+            print(f"❌ Error loading shortlist index: {e}")
+        
+        return self.shortlist_index
 
-         return df
+    def close_shortlist_index(self):
+        """Close the shortlist index store opened by this instance"""
+        if self.shortlist_index is not None:
+            self.shortlist_index.close()
+        self.shortlist_index = None
 
+    def rebuild_shortlist_index(self):
+        """Rebuild the shortlist index from the full shortlist log"""
+        count = self.load_shortlist_index().rebuild()
+        print(f"✅ Rebuilt shortlist index from {count} log rows")
 
+    def auto_evaluate_candidates(self, df=None, save=True):
+        """Automatically evaluate candidates based on response quality and technical score
+        
+        With save=False the tracker file is left unchanged (used by dry runs).
+        """
+        if df is None:
+            df = self.load_candidate_responses()
+        
+        if df.empty:
+            return df
+        
+        scored = 0
+        if self.auto_score_responses:
+            from response_scorer import ResponseScorer
+            scored = ResponseScorer(self.responses_csv).score_pending_responses(df)
+        
+        for column in ('next_step', 'notes', 'response_quality', 'technical_score'):
+            if column not in df.columns:
+                df[column] = ''
+        
+        # Rows that already have a decision are left as they are
+        next_step = df['next_step'].fillna('').astype(str).str.strip()
+        undecided = next_step == ''
+        pending = df[undecided]
+        
+        if pending.empty:
+            print("✅ No undecided candidates to evaluate")
+            if save and scored:
+                save_tracker_columns(self.responses_csv, df, EVALUATION_COLUMNS)
+            return df
+        
+        quality = pending['response_quality'].fillna('').astype(str).str.strip()
+        score = pd.to_numeric(pending['technical_score'], errors='coerce')
+        score = np.trunc(score.where(np.isfinite(score), 0).fillna(0)).astype(int)
+        
+        conditions = [self.rule_mask(rule, quality.str.lower(), score) for rule in self.evaluation_rules]
+        outcome = np.select(conditions, range(len(self.evaluation_rules)), default=-1)
+        
+        steps = np.array([rule["next_step"] for rule in self.evaluation_rules] + [self.default_next_step], dtype=object)
+        labels = np.array([rule.get("note", "") for rule in self.evaluation_rules] + [""], dtype=object)
+        
+        decided_steps = pd.Series(steps[outcome], index=pending.index)
+        note_labels = pd.Series(labels[outcome], index=pending.index)
+        new_notes = " [" + note_labels + ": Quality=" + quality + ", Score=" + score.astype(str) + "]"
+        
+        df['next_step'] = df['next_step'].astype(object)
+        df['notes'] = df['notes'].astype(object)
+        df.loc[pending.index, 'next_step'] = decided_steps
+        with_note = note_labels != ""
+        df.loc[with_note[with_note].index, 'notes'] = (
+            pending.loc[with_note, 'notes'].fillna('').astype(str) + new_notes[with_note]
+        )
+        
+        for step, count in decided_steps.value_counts().items():
+            print(f"   {step}: {count} candidates")
+        
+        if save:
+            save_tracker_columns(self.responses_csv, df, EVALUATION_COLUMNS)
+        print(f"\n💾 Auto-evaluated {len(pending)} candidates")
+        
+        return df
+
+    def rule_mask(self, rule, quality, score):
+        """Boolean mask for one evaluation rule over lower-cased quality and integer score"""
+        checks = []
+        if "quality_in" in rule:
+            checks.append(quality.isin(rule["quality_in"]))
+        if "quality_not_in" in rule:
+            checks.append(~quality.isin(rule["quality_not_in"]))
+        if "score_above" in rule:
+            checks.append(score > rule["score_above"])
+        if "score_at_most" in rule:
+            checks.append(score <= rule["score_at_most"])
+        if "score_not" in rule:
+            checks.append(score != rule["score_not"])
+        
+        if not checks:
+            return pd.Series(True, index=score.index)
+        
+        mask = checks[0]
+        for check in checks[1:]:
+            mask = (mask | check) if rule.get("combine") == "any" else (mask & check)
+        return mask
+
+    def composite_scores(self, df):
+        """Ranking score from technical_score and response_quality"""
+        technical = pd.to_numeric(df['technical_score'], errors='coerce').fillna(0)
+        quality = df['response_quality'].fillna('').astype(str).str.strip().str.lower().map(self.quality_points).fillna(0)
+        return self.ranking_weights["technical_score"] * technical + self.ranking_weights["quality"] * quality
+
+    def rank_shortlist(self, df, save=True):
+        """Keep the top K shortlisted candidates per domain and move the rest to Waitlist.
+        
+        Uses a bounded min-heap per domain, so the cost is O(n log K). Equal scores
+        go to whoever responded first. Candidates who already received an invite
+        keep their place and count against the capacity.
+        """
+        shortlisted = df['next_step'].fillna('').astype(str).str.contains('Shortlist', case=False)
+        candidates = df[shortlisted]
+        if candidates.empty:
+            return df
+        
+        scores = self.composite_scores(candidates)
+        if 'response_date' in candidates.columns:
+            responded = pd.to_datetime(candidates['response_date'], errors='coerce')
+            response_order = (responded - pd.Timestamp(0)).dt.total_seconds().fillna(np.inf)
+        else:
+            response_order = pd.Series(0.0, index=candidates.index)
+        
+        heaps = {}
+        reserved = {}
+        waitlisted = []
+        for position, (label, email, domain, score, order) in enumerate(zip(
+                candidates.index, candidates['email'], candidates['domain'], scores, response_order)):
+            capacity = self.domain_capacity.get(domain, self.default_domain_capacity)
+            if capacity is None:
+                continue
+            if self.is_already_processed(email, 'shortlist'):
+                reserved[domain] = reserved.get(domain, 0) + 1
+                continue
+            
+            heap = heaps.setdefault(domain, [])
+            # The heap root is the weakest kept candidate; on equal scores the later response
+            entry = (score, -order, -position, label)
+            if len(heap) < capacity:
+                heapq.heappush(heap, entry)
+            else:
+                waitlisted.append(heapq.heappushpop(heap, entry)[3])
+        
+        # Slots taken by earlier invites are freed from the weakest kept candidates
+        for domain, heap in heaps.items():
+            for _ in range(min(reserved.get(domain, 0), len(heap))):
+                waitlisted.append(heapq.heappop(heap)[3])
+        
+        if waitlisted:
+            df['next_step'] = df['next_step'].astype(object)
+            df['notes'] = df['notes'].astype(object)
+            df.loc[waitlisted, 'next_step'] = "Waitlist"
+            df.loc[waitlisted, 'notes'] = df.loc[waitlisted, 'notes'].fillna('').astype(str) + " [Waitlisted: domain capacity reached]"
+            if save:
+                save_tracker_columns(self.responses_csv, df, EVALUATION_COLUMNS)
+        
+        print(f"📋 Ranked {len(candidates)} shortlisted candidates, {len(waitlisted)} moved to Waitlist")
+        return df
 
     def get_shortlisted_candidates(self, df=None):
         """Get candidates marked for shortlisting"""
@@ -158,54 +339,38 @@ CodeCelix Team"""
         print(f"✅ WhatsApp group link updated: {group_link}")
 
     def send_whatsapp_automatically(self, phone, message):
-        """Automatically send WhatsApp message"""
-        try:
-            encoded_message = urllib.parse.quote(message, safe='')
-            whatsapp_url = f"https://web.whatsapp.com/send?phone={phone}&text={encoded_message}"
-            
-            webbrowser.open(whatsapp_url)
-            
-            time.sleep(2)
-            
+        """Send WhatsApp message through the shared rate-limited outbound queue"""
+        outbound = get_outbound_queue()
+        success, result = outbound.send(phone, message)
+        
+        if success and outbound.transport.name == 'browser':
             print(f"✅ WhatsApp web opened for automated message")
-            return True, "WhatsApp web opened successfully"
-            
-        except Exception as error:
-            return False, f"Failed to open WhatsApp: {error}"
+        
+        return success, result
 
     def is_already_processed(self, email, action_type):
         """Check if candidate has already been processed for this action"""
-        if not os.path.exists(self.shortlist_log_csv):
-            return False
+        if self.shortlist_index is None:
+            self.load_shortlist_index()
         
-        try:
-            log_df = pd.read_csv(self.shortlist_log_csv)
-            processed = log_df[
-                (log_df['email'] == email) & 
-                (log_df['action_type'] == action_type) & 
-                (log_df['status'] == 'Success')
-            ]
-            return len(processed) > 0
-        except Exception as e:
-            print(f"❌ Error checking processing history: {e}")
-            return False
+        return self.shortlist_index.view('processed').contains(email, action_type)
 
     def send_shortlist_invite(self, candidate_data, method='auto'):
         """Send shortlist group invite to a candidate"""
         name = candidate_data.get('name', 'Candidate')
         email = candidate_data.get('email', '')
         domain = candidate_data.get('domain', 'Unknown')
-        phone = candidate_data.get('phone', 'Not found')
+        phone = self.phone_normalizer.normalize(candidate_data.get('phone'))
         
         print(f"\n🎉 Processing shortlist invite: {name} ({email})")
         print(f"🎯 Domain: {domain}")
-        print(f"📱 Phone: {phone}")
+        print(f"📱 Phone: {phone or 'Not found'}")
         
         if self.is_already_processed(email, 'shortlist'):
             print(f"⏭️ Shortlist invite already sent, skipping...")
             return True, "Already processed"
         
-        if phone == 'Not found' or not phone:
+        if not phone:
             print("❌ No phone number available for this candidate")
             self.log_shortlist_invite(candidate_data, "shortlist", "No phone found", 
                                     error_msg="No phone number available")
@@ -251,16 +416,16 @@ CodeCelix Team"""
         """Send rejection message to a candidate"""
         name = candidate_data.get('name', 'Candidate')
         email = candidate_data.get('email', '')
-        phone = candidate_data.get('phone', 'Not found')
+        phone = self.phone_normalizer.normalize(candidate_data.get('phone'))
         
         print(f"\n❌ Processing rejection message: {name} ({email})")
-        print(f"📱 Phone: {phone}")
+        print(f"📱 Phone: {phone or 'Not found'}")
         
         if self.is_already_processed(email, 'rejection'):
             print(f"⏭️ Rejection message already sent, skipping...")
             return True, "Already processed"
         
-        if phone == 'Not found' or not phone:
+        if not phone:
             print("❌ No phone number available for this candidate")
             self.log_shortlist_invite(candidate_data, "rejection", "No phone found",
                                     error_msg="No phone number available")
@@ -294,9 +459,9 @@ CodeCelix Team"""
         
         return False, "Unknown method"
 
-    def log_shortlist_invite(self, candidate_data, action_type, status, link=None, error_msg=None):
-        """Log shortlist invite or rejection message"""
-        log_entry = {
+    def build_shortlist_log_entry(self, candidate_data, action_type, status, link=None, error_msg=None):
+        """Build a shortlist log row without writing it"""
+        return {
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'name': candidate_data.get('name', ''),
             'email': candidate_data.get('email', ''),
@@ -308,26 +473,140 @@ CodeCelix Team"""
             'group_link': self.whatsapp_group_link if action_type == 'shortlist' else 'N/A',
             'error_message': error_msg or ''
         }
+
+    def log_shortlist_invite(self, candidate_data, action_type, status, link=None, error_msg=None):
+        """Log shortlist invite or rejection message"""
+        log_entry = self.build_shortlist_log_entry(candidate_data, action_type, status, link, error_msg)
         
         file_exists = os.path.isfile(self.shortlist_log_csv)
         
         with open(self.shortlist_log_csv, 'a', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['timestamp', 'name', 'email', 'domain', 'phone', 
-                         'action_type', 'status', 'whatsapp_link', 'group_link', 'error_message']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=SHORTLIST_LOG_FIELDS)
             
             if not file_exists:
                 writer.writeheader()
             
             writer.writerow(log_entry)
+        
+        if self.shortlist_index is not None:
+            try:
+                self.shortlist_index.sync()
+            except Exception as e:
+                # The row is in the log already; the next sync picks it up
+                print(f"❌ Error updating shortlist index: {e}")
 
-    def process_all_shortlisted(self, send_rejections=True, method='auto'):
-        """Process all shortlisted candidates and optionally send rejections"""
+    def simulate_processing(self, send_rejections=True, rank=None, report_csv=None):
+        """Dry run of process_all_shortlisted with no sends and no changes to the tracker or log.
+        
+        Runs evaluation, de-duplication, message rendering and log-row generation, and
+        writes the log rows that would be produced (plus outcome and message) to a report.
+        """
+        report_csv = report_csv or self.dry_run_report_csv
+        timings = []
+        
+        def finish_stage(stage, started, rows):
+            timings.append({'stage': stage, 'seconds': round(time.perf_counter() - started, 4), 'rows': rows})
+        
+        started = time.perf_counter()
+        df = self.load_candidate_responses()
+        finish_stage('load', started, len(df))
+        
+        if df.empty:
+            return pd.DataFrame()
+        
+        started = time.perf_counter()
+        df = self.auto_evaluate_candidates(df, save=False)
+        finish_stage('evaluate', started, len(df))
+        
+        if self.ranking_mode if rank is None else rank:
+            started = time.perf_counter()
+            df = self.rank_shortlist(df, save=False)
+            finish_stage('rank', started, len(df))
+        
+        started = time.perf_counter()
+        self.load_shortlist_index()
+        processed = self.shortlist_index.view('processed')
+        batches = [('shortlist', self.get_shortlisted_candidates(df))]
+        if send_rejections:
+            batches.append(('rejection', self.get_rejected_candidates(df)))
+        
+        planned = []
+        for action_type, rows in batches:
+            if rows.empty:
+                continue
+            phones = self.phone_normalizer.normalize_series(rows['phone']) if 'phone' in rows.columns \
+                else pd.Series(None, index=rows.index, dtype=object)
+            already = pd.Series([processed.contains(email, action_type) for email in rows['email']], index=rows.index)
+            no_group_link = action_type == 'shortlist' and "YOUR_GROUP_INVITE_LINK_HERE" in self.whatsapp_group_link
+            outcome = np.select(
+                [already, phones.isna(), pd.Series(no_group_link, index=rows.index)],
+                ["Already processed", "No phone found", "No group link"],
+                default="Would send"
+            )
+            planned.append((action_type, rows, phones, pd.Series(outcome, index=rows.index)))
+        finish_stage('de-duplicate', started, sum(len(rows) for _, rows, _, _ in planned))
+        
+        started = time.perf_counter()
+        rendered = []
+        for action_type, rows, phones, outcome in planned:
+            names = rows['name'].fillna('Candidate').astype(str)
+            if action_type == 'shortlist':
+                messages = "Hi " + names + "! 👋\n\n" + self.shortlist_message.format(group_link=self.whatsapp_group_link)
+            else:
+                messages = "Hi " + names + ",\n\n" + self.rejection_message
+            rendered.append(messages)
+        finish_stage('render', started, sum(len(messages) for messages in rendered))
+        
+        started = time.perf_counter()
+        statuses = {"Would send": "Success", "No phone found": "No phone found", "No group link": "No group link"}
+        errors = {"No phone found": "No phone number available", "No group link": "WhatsApp group link not configured"}
+        report_rows = []
+        for (action_type, rows, phones, outcome), messages in zip(planned, rendered):
+            for candidate_data, phone, result, message in zip(rows.to_dict('records'), phones, outcome, messages):
+                entry = self.build_shortlist_log_entry(
+                    candidate_data, action_type, statuses.get(result, ''), error_msg=errors.get(result)
+                )
+                entry['phone'] = phone if isinstance(phone, str) else ''
+                entry['outcome'] = result
+                entry['message'] = message
+                report_rows.append(entry)
+        report_df = pd.DataFrame(report_rows, columns=SHORTLIST_LOG_FIELDS + ['outcome', 'message'])
+        finish_stage('log rows', started, len(report_df))
+        
+        report_df.to_csv(report_csv, index=False)
+        timings_csv = os.path.splitext(report_csv)[0] + "_timings.csv"
+        pd.DataFrame(timings).to_csv(timings_csv, index=False)
+        
+        print(f"\n🧪 Dry run complete: nothing was sent or logged")
+        for (action_type, _, _, outcome) in planned:
+            for result, count in outcome.value_counts().items():
+                print(f"   {action_type} - {result}: {count}")
+        print("\n⏱️ Stage timings:")
+        for timing in timings:
+            print(f"   {timing['stage']}: {timing['seconds'] * 1000:.1f} ms ({timing['rows']} rows)")
+        print(f"📄 Report: {report_csv}")
+        
+        return report_df
+
+    def process_all_shortlisted(self, send_rejections=True, method='auto', rank=None, dry_run=False):
+        """Process all shortlisted candidates and optionally send rejections
+        
+        rank=True (or ranking_mode) caps invites per domain with rank_shortlist.
+        dry_run=True only simulates the run (see simulate_processing).
+        """
+        if dry_run:
+            return self.simulate_processing(send_rejections, rank)
+        
         df = self.auto_evaluate_candidates()
         
         
         if df.empty:
             return
+        
+        self.load_shortlist_index()
+        
+        if self.ranking_mode if rank is None else rank:
+            df = self.rank_shortlist(df)
 
         
         shortlisted = self.get_shortlisted_candidates(df)
@@ -352,8 +631,6 @@ CodeCelix Team"""
                         shortlist_skipped += 1
                     else:
                         shortlist_success += 1
-                        if method == 'auto':
-                            time.sleep(3)
                 else:
                     shortlist_failed += 1
         
@@ -380,8 +657,6 @@ CodeCelix Team"""
                             rejection_skipped += 1
                         else:
                             rejection_success += 1
-                            if method == 'auto':
-                                time.sleep(3)
                     else:
                         rejection_failed += 1
         
@@ -444,8 +719,11 @@ if __name__ == "__main__":
     print("4. Show shortlist statistics")
     print("5. Set WhatsApp group link")
     print("6. Test shortlist invite for single candidate")
+    print("7. Rebuild shortlist index")
+    print("8. Process shortlist ranked by domain capacity")
+    print("9. Dry run (evaluate and report, nothing sent)")
     
-    choice = input("\nEnter your choice (1-6): ")
+    choice = input("\nEnter your choice (1-9): ")
     
     if choice == "1":
         shortlist_system.process_all_shortlisted(send_rejections=True, method='auto')
@@ -474,5 +752,19 @@ if __name__ == "__main__":
         else:
             print("❌ No shortlisted candidates found")
     
+    elif choice == "7":
+        shortlist_system.rebuild_shortlist_index()
+    
+    elif choice == "8":
+        capacity = input("Invites per domain: ").strip()
+        if capacity:
+            shortlist_system.default_domain_capacity = int(capacity)
+            shortlist_system.process_all_shortlisted(send_rejections=False, method='auto', rank=True)
+        else:
+            print("❌ No capacity provided")
+    
+    elif choice == "9":
+        shortlist_system.process_all_shortlisted(send_rejections=True, dry_run=True)
+    
     else:
         print("Invalid choice. Exiting...")
\ No newline at end of file
@@ -0,0 +1,122 @@
+import time
+import smtplib
+import threading
+
+
+class SMTPSession:
+    """One logged-in SMTP connection reused across sends.
+
+    The connection is opened (STARTTLS + login) on first use. If it has been
+    idle for longer than ``noop_after`` seconds it is probed with NOOP before
+    the next send, and a send that fails because the server dropped the
+    connection is retried once on a fresh one.
+    """
+
+    def __init__(self, smtp_server, smtp_port, sender_email, sender_password,
+                 noop_after=30, timeout=30):
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.noop_after = noop_after
+        self.timeout = timeout
+
+        self.server = None
+        self.last_used = 0.0
+        self.connect_count = 0
+        self.lock = threading.Lock()
+
+    def connect(self):
+        self.close()
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            server.starttls()
+            server.login(self.sender_email, self.sender_password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.connect_count += 1
+        self.last_used = time.monotonic()
+
+    def is_alive(self):
+        """NOOP the connection if it has been idle long enough to have been dropped"""
+        if self.server is None:
+            return False
+        if time.monotonic() - self.last_used < self.noop_after:
+            return True
+        try:
+            return self.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def ensure_connected(self):
+        if not self.is_alive():
+            self.connect()
+
+    def _send(self, recipients, message):
+        self.ensure_connected()
+        try:
+            self.server.sendmail(self.sender_email, recipients, message.as_string())
+        except smtplib.SMTPServerDisconnected:
+            self.reconnect_and_send(recipients, message)
+        except smtplib.SMTPException:
+            # Refusals and data errors would fail again on a new connection
+            raise
+        except OSError:
+            self.reconnect_and_send(recipients, message)
+        self.last_used = time.monotonic()
+
+    def reconnect_and_send(self, recipients, message):
+        """The server closed the session under us; retry once on a new connection"""
+        self.connect()
+        self.server.sendmail(self.sender_email, recipients, message.as_string())
+
+    def send(self, recipients, message):
+        """Send one MIME message; returns (success, message)"""
+        return self.send_batch([(recipients, message)])[0]
+
+    def send_batch(self, messages):
+        """Send (recipients, message) pairs over the one connection; returns a (success, message) per pair"""
+        results = []
+        with self.lock:
+            for recipients, message in messages:
+                try:
+                    self._send(recipients, message)
+                    results.append((True, "Email sent successfully"))
+                except Exception as error:
+                    results.append((False, str(error)))
+        return results
+
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+
+_shared_sessions = {}
+_shared_lock = threading.Lock()
+
+
+def get_smtp_session(smtp_server, smtp_port, sender_email, sender_password):
+    """Process-wide session per server and account, replaced if the password changes"""
+    key = (smtp_server, smtp_port, sender_email)
+    with _shared_lock:
+        session = _shared_sessions.get(key)
+        if session is None or session.sender_password != sender_password:
+            if session is not None:
+                session.close()
+            session = SMTPSession(smtp_server, smtp_port, sender_email, sender_password)
+            _shared_sessions[key] = session
+        return session
+
+
+def close_smtp_sessions():
+    with _shared_lock:
+        for session in _shared_sessions.values():
+            session.close()
+        _shared_sessions.clear()
@@ -0,0 +1,145 @@
+import asyncio
+import time
+import aiohttp
+from whatsapp_transport import TokenBucket, CloudAPITransport, MockMessagingServer
+
+
+class AsyncWhatsAppDispatcher:
+    """Sends many WhatsApp messages concurrently over one keep-alive HTTP connection pool"""
+
+    def __init__(self, messages_url, access_token="", concurrency=20, pool_size=None,
+                 rate_per_minute=None, timeout=10):
+        self.messages_url = messages_url
+        self.access_token = access_token
+        self.concurrency = concurrency
+        self.pool_size = pool_size or concurrency
+        self.rate_limiter = TokenBucket(rate_per_minute) if rate_per_minute else None
+        self.timeout = timeout
+
+    @classmethod
+    def from_transport(cls, transport, **kwargs):
+        """Reuse the endpoint and credentials of a CloudAPITransport"""
+        return cls(transport.messages_url, transport.access_token, **kwargs)
+
+    def build_payload(self, phone, message):
+        return {
+            "messaging_product": "whatsapp",
+            "to": phone,
+            "type": "text",
+            "text": {"body": message}
+        }
+
+    async def _send(self, session, semaphore, job, before_send=None):
+        key, phone, message = job
+
+        async with semaphore:
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            if before_send is not None and not before_send(key):
+                return key, (False, "Skipped before sending"), None
+
+            started = time.perf_counter()
+            try:
+                async with session.post(self.messages_url, json=self.build_payload(phone, message)) as response:
+                    if response.status >= 400:
+                        text = await response.text()
+                        result = (False, f"HTTP {response.status}: {text[:200]}")
+                    else:
+                        data = await response.json(content_type=None)
+                        message_ids = [item.get('id') for item in (data or {}).get('messages', [])]
+                        result = (True, message_ids[0] if message_ids else "Message accepted")
+            except Exception as error:
+                result = (False, f"Failed to send via WhatsApp API: {error}")
+
+            return key, result, time.perf_counter() - started
+
+    async def dispatch(self, jobs, on_result=None, before_send=None):
+        """Send (key, phone, message) jobs; on_result(key, success, result) runs in completion order.
+
+        before_send(key) runs right before each request; returning False skips the message.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+        headers = {"Authorization": f"Bearer {self.access_token}"} if self.access_token else {}
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        latencies = []
+        async with aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout) as session:
+            tasks = [asyncio.create_task(self._send(session, semaphore, job, before_send)) for job in jobs]
+
+            for task in asyncio.as_completed(tasks):
+                key, (success, result), latency = await task
+                if latency is not None:
+                    latencies.append(latency)
+                if on_result is not None:
+                    on_result(key, success, result)
+
+        return latencies
+
+    def run(self, jobs, on_result=None, before_send=None):
+        """Blocking wrapper around dispatch; returns per-message latencies in seconds"""
+        return asyncio.run(self.dispatch(jobs, on_result, before_send))
+
+
+def summarize_latencies(latencies, elapsed):
+    """Messages/sec and latency percentiles for a dispatch run"""
+    if not latencies:
+        return {"messages": 0, "messages_per_sec": 0.0, "p50_ms": 0.0, "p99_ms": 0.0}
+
+    ordered = sorted(latencies)
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        "messages": len(ordered),
+        "messages_per_sec": len(ordered) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def benchmark(messages=500, concurrency=50, latency=0.02):
+    """Compare async dispatch with blocking sends against a local mock messaging server"""
+    server = MockMessagingServer(latency=latency).start()
+    transport = CloudAPITransport("benchmark-token", "0000", api_url=server.api_url)
+    jobs = [(i, f"92300{i:07d}", f"Benchmark message {i}") for i in range(messages)]
+
+    try:
+        sample = jobs[:max(1, messages // 10)]
+        latencies = []
+        started = time.perf_counter()
+        for _, phone, message in sample:
+            send_started = time.perf_counter()
+            transport.send(phone, message)
+            latencies.append(time.perf_counter() - send_started)
+        blocking = summarize_latencies(latencies, time.perf_counter() - started)
+
+        dispatcher = AsyncWhatsAppDispatcher.from_transport(transport, concurrency=concurrency)
+        started = time.perf_counter()
+        latencies = dispatcher.run(jobs)
+        dispatched = summarize_latencies(latencies, time.perf_counter() - started)
+    finally:
+        transport.close()
+        server.stop()
+
+    print(f"\n📊 Mock server latency: {latency * 1000:.0f} ms")
+    for label, stats in (("Blocking", blocking), (f"Async x{concurrency}", dispatched)):
+        print(f"   {label}: {stats['messages']} messages, {stats['messages_per_sec']:.1f} msg/s, "
+              f"p50 {stats['p50_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms")
+
+    return blocking, dispatched
+
+
+if __name__ == "__main__":
+    print("🚀 Async WhatsApp Dispatcher Benchmark")
+    messages = input("Number of messages (default 500): ").strip()
+    concurrency = input("Concurrency (default 50): ").strip()
+
+    benchmark(
+        messages=int(messages) if messages else 500,
+        concurrency=int(concurrency) if concurrency else 50
+    )
@@ -1,19 +1,68 @@
 import os
 import csv
+import heapq
+import html
 import pandas as pd
 import urllib.parse
-import webbrowser
 from datetime import datetime
 import re
-import time
+from concurrent.futures import as_completed
+from contact_events import get_event_stream
+from log_index import CsvLogIndex, SuccessKeysView, RollupView, LatestStateView
+from message_outbox import MessageOutbox
+from phone_normalizer import get_phone_normalizer
+from retry_scheduler import ContactRetryScheduler
+from whatsapp_transport import get_outbound_queue
+
+PHONE_PATTERNS = [
+    r'\+92[\s\-]?[\d\s\-]{10,}',
+    r'92[\s\-]?[\d\s\-]{10,}',
+    r'03[\d\s\-]{9,}',
+    r'\+[\d\s\-]{10,15}',
+    r'[\(]?[\d\s\-\)]{10,15}',
+    r'(?:phone|mobile|cell|contact)[\s:]+[\+]?[\d\s\-\(\)]{10,15}',
+]
+
+CONTACT_LOG_FIELDS = ['timestamp', 'name', 'email', 'domain', 'phone',
+                      'contact_method', 'status', 'whatsapp_link', 'message_sent', 'error_message']
+
+COMPILED_PHONE_PATTERNS = [re.compile(f'({pattern})', re.IGNORECASE) for pattern in PHONE_PATTERNS]
 
 class WhatsAppContactSystem:
     def __init__(self):
         self.processed_csv = "data/cv_with_domains.csv"
         self.contact_log_csv = "data/whatsapp_contact_log.csv"
+        self.contact_index_db = "data/whatsapp_contact_index.db"
+        # Latest row per email lives in its own store, opened only by the callers that need it
+        self.contact_state_db = "data/whatsapp_contact_state.db"
+        
+        # Keep the contact index on disk so restarts don't rescan the log
+        self.persist_contact_index = True
+        self.contact_index = None
+        self.contact_state_index = None
+        self.retry_scheduler = ContactRetryScheduler()
+        self.phone_normalizer = get_phone_normalizer()
+        
+        # Durable outbox so an interrupted run resumes without duplicate sends
+        self.outbox_db = "data/message_outbox.db"
+        self.use_outbox = True
+        self.message_type = "initial_contact"
+        self.template_version = "1"
+        self.outbox = None
         
         self.auto_send_enabled = True
-        self.delay_between_messages = 5
+        # When automatic sending fails, print a manual link instead of logging a failure
+        self.fallback_to_manual = True
+        self.async_concurrency = 20
+        # Publish a contact_succeeded event per successful contact (drives follow-up questions)
+        self.publish_contact_events = True
+        
+        # Priority mode: contact the strongest, newest applicants first
+        self.priority_mode = False
+        self.priority_weights = {"confidence": 1.0, "recency": 0.5}
+        self.recency_half_life_days = 7
+        # Optional cap on successful contacts per domain, e.g. {"MERN Stack": 10}
+        self.domain_quotas = {}
         
         self.company_intro = """Hello! This is CodeCelix, an Italy-based tech company.
 
@@ -41,7 +90,7 @@ Looking forward to your response! """
             print(f"❌ {self.processed_csv} not found. Please run domain detection first.")
             return pd.DataFrame()
         
-        df = pd.read_csv(self.processed_csv)
+        df = pd.read_csv(self.processed_csv, dtype={'phone': str})
         print(f"📊 Loaded {len(df)} candidates from {self.processed_csv}")
         return df
 
@@ -50,17 +99,8 @@ Looking forward to your response! """
         if not cv_text_preview or pd.isna(cv_text_preview):
             return None
         
-        phone_patterns = [
-            r'\+92[\s\-]?[\d\s\-]{10,}',
-            r'92[\s\-]?[\d\s\-]{10,}',
-            r'03[\d\s\-]{9,}',
-            r'\+[\d\s\-]{10,15}',
-            r'[\(]?[\d\s\-\)]{10,15}',
-            r'(?:phone|mobile|cell|contact)[\s:]+[\+]?[\d\s\-\(\)]{10,15}',
-        ]
-        
-        for pattern in phone_patterns:
-            matches = re.findall(pattern, cv_text_preview, re.IGNORECASE)
+        for pattern in COMPILED_PHONE_PATTERNS:
+            matches = pattern.findall(cv_text_preview)
             if matches:
                 phone = re.sub(r'[\s\-\(\)phone|mobile|cell|contact:]', '', matches[0], flags=re.IGNORECASE)
                 phone = re.sub(r'[^\d+]', '', phone)
@@ -72,52 +112,136 @@ Looking forward to your response! """
 
     def format_phone_number(self, phone):
         """Format phone number for WhatsApp with improved validation"""
-        if not phone:
-            return None
+        return self.phone_normalizer.normalize(phone)
+
+    def extract_phones_batch(self, cv_text_series):
+        """Extract and format phone numbers for a whole column of CV text"""
+        text = cv_text_series.astype(object).where(cv_text_series.notna(), '').astype(str)
+        phones = pd.Series(None, index=text.index, dtype=object)
+        unresolved = text != ''
+        
+        # Same priority as extract_phone_from_cv: each pattern only runs on the
+        # rows that no earlier pattern resolved to a 10+ digit number
+        for pattern in COMPILED_PHONE_PATTERNS:
+            if not unresolved.any():
+                break
+            
+            found = text[unresolved].str.extract(pattern, expand=False)
+            digits = found.str.replace(r'[^\d+]', '', regex=True)
+            accepted = digits[digits.str.len() >= 10]
+            
+            phones[accepted.index] = accepted
+            unresolved[accepted.index] = False
         
-        phone = re.sub(r'[^\d+]', '', phone)
-        phone = phone.replace('+', '')
-        
-        if phone.startswith('03') and len(phone) == 11:
-            phone = '92' + phone[1:]
-        elif phone.startswith('3') and len(phone) == 10:
-            phone = '92' + phone
-        elif phone.startswith('0') and len(phone) == 11:
-            phone = '92' + phone[1:]
-        elif not phone.startswith('92') and len(phone) >= 10:
-            if len(phone) == 10:
-                phone = '92' + phone
-            elif len(phone) == 11 and phone.startswith('0'):
-                phone = '92' + phone[1:]
-        
-        if len(phone) >= 12 and phone.startswith('92'):
-            return phone
-        elif len(phone) >= 10:
-            return phone
+        return self.format_phones_batch(phones)
+
+    def format_phones_batch(self, phone_series):
+        """Vectorized equivalent of format_phone_number for a column of raw phones"""
+        return self.phone_normalizer.normalize_series(phone_series)
+
+    def ensure_phone_column(self, df):
+        """Fill the phone column once for candidates that don't have one yet and save it"""
+        if 'phone' not in df.columns:
+            df['phone'] = None
         
-        return None
+        missing = df['phone'].isna()
+        if not missing.any():
+            return df
+        
+        phones = self.extract_phones_batch(df.loc[missing, 'cv_text_preview'])
+        df['phone'] = df['phone'].astype(object)
+        df.loc[missing, 'phone'] = phones.fillna('Not found')
+        
+        df.to_csv(self.processed_csv, index=False)
+        print(f"📱 Extracted phone numbers for {int(missing.sum())} candidates")
+        
+        return df
+
+    def get_candidate_phone(self, candidate_data):
+        """Return the formatted phone for a candidate, using the phone column when present"""
+        phone = candidate_data.get('phone')
+        if phone is not None and not pd.isna(phone):
+            return self.format_phone_number(phone)
+        
+        return self.format_phone_number(self.extract_phone_from_cv(candidate_data.get('cv_text_preview', '')))
 
     def send_whatsapp_automatically(self, phone, message):
-        """Automatically send WhatsApp message using web automation"""
-        try:
-            encoded_message = urllib.parse.quote(message, safe='')
-            whatsapp_url = f"https://web.whatsapp.com/send?phone={phone}&text={encoded_message}"
-            
-            webbrowser.open(whatsapp_url)
-            
-            time.sleep(2)
-            
+        """Send WhatsApp message through the shared rate-limited outbound queue"""
+        outbound = get_outbound_queue()
+        success, result = outbound.send(phone, message)
+        
+        if success and outbound.transport.name == 'browser':
             print(f"✅ WhatsApp web opened for {phone}")
             print("🤖 Please manually send the message or implement selenium automation")
-            
-            return True, "WhatsApp web opened successfully"
-            
-        except Exception as error:
-            return False, f"Failed to open WhatsApp: {error}"
+        
+        return success, result
 
-    def log_contact_attempt(self, candidate_data, method, status, phone=None, link=None, error_msg=None):
-        """Log contact attempt to CSV with enhanced logging"""
-        log_entry = {
+    def set_contact_log(self, contact_log_csv):
+        """Point the system at another contact log; a non-default log gets its own index store"""
+        if contact_log_csv == self.contact_log_csv:
+            return
+        
+        self.close_contact_index()
+        self.contact_log_csv = contact_log_csv
+        self.contact_index_db = os.path.splitext(contact_log_csv)[0] + "_index.db"
+        self.contact_state_db = os.path.splitext(contact_log_csv)[0] + "_state.db"
+
+    def close_contact_index(self):
+        """Close the contact index stores opened by this instance"""
+        for index in (self.contact_index, self.contact_state_index):
+            if index is not None:
+                index.close()
+        self.contact_index = None
+        self.contact_state_index = None
+
+    def load_contact_index(self):
+        """Load the contact-state index once per run and catch up with new log rows"""
+        if self.contact_index is None:
+            self.contact_index = CsvLogIndex(
+                self.contact_log_csv,
+                self.contact_index_db if self.persist_contact_index else None,
+                views=[
+                    SuccessKeysView('contacted', ['email']),
+                    RollupView('domain', 'domain', 'message_sent', 'Yes', 'error_message'),
+                    self.retry_scheduler
+                ]
+            )
+        
+        try:
+            self.contact_index.sync()
+        except Exception as e:
+            print(f"❌ Error loading contact index: {e}")
+        
+        return self.contact_index
+
+    def load_contact_state_index(self):
+        """Latest contact log row per email (all rows, and successful ones), caught up with the log"""
+        if self.contact_state_index is None:
+            self.contact_state_index = CsvLogIndex(
+                self.contact_log_csv,
+                self.contact_state_db if self.persist_contact_index else None,
+                views=[
+                    LatestStateView('contact', 'email'),
+                    LatestStateView('successful_contact', 'email', 'message_sent', 'Yes')
+                ]
+            )
+        
+        try:
+            self.contact_state_index.sync()
+        except Exception as e:
+            print(f"❌ Error loading contact state index: {e}")
+        
+        return self.contact_state_index
+
+    def rebuild_contact_index(self):
+        """Rebuild the contact indexes from the full contact log"""
+        count = self.load_contact_index().rebuild()
+        self.load_contact_state_index().rebuild()
+        print(f"✅ Rebuilt contact index from {count} log rows")
+
+    def build_log_entry(self, candidate_data, method, status, phone=None, link=None, error_msg=None):
+        """Build one contact log row"""
+        return {
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'name': candidate_data.get('name', ''),
             'email': candidate_data.get('email', ''),
@@ -129,63 +253,81 @@ Looking forward to your response! """
             'message_sent': 'Yes' if status == 'Success' else 'No',
             'error_message': error_msg or ''
         }
+
+    def log_contact_attempt(self, candidate_data, method, status, phone=None, link=None, error_msg=None):
+        """Log contact attempt to CSV with enhanced logging"""
+        self.log_contact_attempts([self.build_log_entry(candidate_data, method, status, phone, link, error_msg)])
+
+    def log_contact_attempts(self, log_entries):
+        """Append several contact log rows in one write"""
+        if not log_entries:
+            return
         
         file_exists = os.path.isfile(self.contact_log_csv)
         
         with open(self.contact_log_csv, 'a', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['timestamp', 'name', 'email', 'domain', 'phone', 
-                         'contact_method', 'status', 'whatsapp_link', 'message_sent', 'error_message']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=CONTACT_LOG_FIELDS)
             
             if not file_exists:
                 writer.writeheader()
             
-            writer.writerow(log_entry)
+            writer.writerows(log_entries)
+        
+        for index in (self.contact_index, self.contact_state_index):
+            if index is None:
+                continue
+            try:
+                index.sync()
+            except Exception as e:
+                # The rows are in the log already; the next sync picks them up
+                print(f"❌ Error updating contact index: {e}")
+        
+        if self.publish_contact_events:
+            # Manual rows only produced a link, so nothing has reached the candidate yet
+            succeeded = [entry for entry in log_entries
+                         if entry.get('message_sent') == 'Yes' and entry.get('contact_method') == 'Auto']
+            get_event_stream().publish_many('contact_succeeded', succeeded)
 
     def is_already_contacted(self, email):
         """Check if candidate has already been contacted successfully"""
-        if not os.path.exists(self.contact_log_csv):
-            return False
+        if self.contact_index is None:
+            self.load_contact_index()
         
-        try:
-            log_df = pd.read_csv(self.contact_log_csv)
-            successful_contacts = log_df[
-                (log_df['email'] == email) & 
-                (log_df['status'] == 'Success')
-            ]
-            return len(successful_contacts) > 0
-        except Exception as e:
-            print(f"❌ Error checking contact history: {e}")
-            return False
+        return self.contact_index.view('contacted').contains(email)
 
-    def contact_candidate(self, candidate_data, method='auto'):
-        """Contact individual candidate with automatic WhatsApp sending"""
+    def prepare_contact(self, candidate_data, method='auto'):
+        """Run the pre-send checks for a candidate.
+        
+        Returns (phone, message) when there is something to send, otherwise
+        (None, (success, result)) with the outcome of the checks.
+        """
         name = candidate_data.get('name', 'Candidate')
         email = candidate_data.get('email', '')
         domain = candidate_data.get('domain', 'Unknown')
-        cv_text = candidate_data.get('cv_text_preview', '')
         
         print(f"\n📞 Processing: {name} ({email})")
         print(f"🎯 Detected Domain: {domain}")
         
         if self.is_already_contacted(email):
             print(f"⏭️ Already contacted successfully, skipping...")
-            return True, "Already contacted"
+            return None, (True, "Already contacted")
         
-        phone = self.extract_phone_from_cv(cv_text)
-        formatted_phone = self.format_phone_number(phone)
+        formatted_phone = self.get_candidate_phone(candidate_data)
         
         if not formatted_phone:
             print("❌ No valid phone number found in CV")
             self.log_contact_attempt(candidate_data, method, "No phone found", error_msg="No valid phone number extracted from CV")
-            return False, "No phone number found"
+            return None, (False, "No phone number found")
         
         print(f"📱 Phone: {formatted_phone}")
         
         full_message = f"Hi {name}! 👋\n\n{self.company_intro}\n\n{self.interview_questions}"
-        
+        return formatted_phone, full_message
+
+    def complete_contact(self, candidate_data, method, formatted_phone, full_message, send_result=None):
+        """Log the outcome of a send, falling back to a manual link if automatic sending failed"""
         if method == 'auto':
-            success, result = self.send_whatsapp_automatically(formatted_phone, full_message)
+            success, result = send_result
             
             if success:
                 print("✅ WhatsApp message initiated automatically")
@@ -193,6 +335,9 @@ Looking forward to your response! """
                 return True, "Message sent automatically"
             else:
                 print(f"❌ Automatic sending failed: {result}")
+                if not self.fallback_to_manual:
+                    self.log_contact_attempt(candidate_data, "Auto", "Failed", formatted_phone, error_msg=result)
+                    return False, result
                 method = 'manual'
         
         if method == 'manual':
@@ -210,23 +355,130 @@ Looking forward to your response! """
         
         return False, "Unknown method"
 
-    def contact_all_candidates(self, method='auto', domain_filter=None, batch_size=5):
-        """Contact all candidates with automatic sending and batch processing"""
-        df = self.load_candidates()
+    def load_outbox(self):
+        """Open the message outbox once per process"""
+        if self.outbox is None:
+            self.outbox = MessageOutbox(self.outbox_db)
+        return self.outbox
+
+    def create_async_dispatcher(self):
+        """Build an asyncio dispatcher on the shared queue's HTTP transport, or None"""
+        outbound = get_outbound_queue()
+        transport = outbound.transport
+        if not hasattr(transport, 'messages_url'):
+            print(f"⚠️ Async dispatch needs an HTTP transport (current: {transport.name}), using the outbound queue instead")
+            return None
         
-        if df.empty:
-            return
+        try:
+            from whatsapp_async_dispatcher import AsyncWhatsAppDispatcher
+        except ImportError as error:
+            print(f"⚠️ Async dispatch unavailable ({error}), using the outbound queue instead")
+            return None
+        
+        return AsyncWhatsAppDispatcher.from_transport(
+            transport,
+            concurrency=self.async_concurrency,
+            rate_per_minute=outbound.rate_limiter.rate_per_minute
+        )
+
+    def contact_candidate(self, candidate_data, method='auto'):
+        """Contact individual candidate with automatic WhatsApp sending"""
+        formatted_phone, payload = self.prepare_contact(candidate_data, method)
+        
+        if formatted_phone is None:
+            return payload
         
+        send_result = None
+        if method == 'auto':
+            send_result = self.send_whatsapp_automatically(formatted_phone, payload)
+        
+        return self.complete_contact(candidate_data, method, formatted_phone, payload, send_result)
+
+    def filter_qualified_candidates(self, df, domain_filter=None):
+        """Keep candidates with a usable domain detection, optionally in one domain"""
         if domain_filter:
             df = df[df['domain'].str.contains(domain_filter, case=False, na=False)]
             print(f"🎯 Filtered to {len(df)} candidates in {domain_filter} domain")
         
-        df = df[
+        return df[
             (df['domain'] != 'Unknown') & 
             (df['domain'] != 'File Not Found') & 
             (df['domain'] != 'Text Extraction Failed') &
             (df['confidence'] >= 20)
         ]
+
+    def priority_scores(self, df, now=None):
+        """Weighted score from domain confidence and application recency (newer scores higher)"""
+        confidence = pd.to_numeric(df['confidence'], errors='coerce').fillna(0)
+        scores = self.priority_weights.get("confidence", 0) * confidence
+        
+        if 'date' in df.columns and self.priority_weights.get("recency"):
+            now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+            applied = pd.to_datetime(df['date'], errors='coerce')
+            age_days = ((now - applied).dt.total_seconds() / 86400).clip(lower=0)
+            recency = (100 * 0.5 ** (age_days / self.recency_half_life_days)).fillna(0)
+            scores = scores + self.priority_weights["recency"] * recency
+        
+        return scores
+
+    def prioritize_candidates(self, df):
+        """Order candidates best-first, dropping those beyond their domain's remaining quota"""
+        scores = self.priority_scores(df)
+        # Position breaks ties so equal scores keep CSV order
+        heap = [(-score, position, label) for position, (label, score) in enumerate(scores.items())]
+        heapq.heapify(heap)
+        
+        remaining = {}
+        if self.domain_quotas:
+            contacted = self.load_contact_index().view('domain').groups
+            remaining = {domain: quota - contacted.get(domain, (0, 0))[1]
+                         for domain, quota in self.domain_quotas.items()}
+        
+        ordered = []
+        over_quota = 0
+        domains = df['domain']
+        emails = df['email']
+        while heap:
+            _, _, label = heapq.heappop(heap)
+            domain = domains[label]
+            
+            # Already-contacted candidates are skipped later and don't use up quota
+            if domain in remaining and not self.is_already_contacted(emails[label]):
+                if remaining[domain] <= 0:
+                    over_quota += 1
+                    continue
+                remaining[domain] -= 1
+            ordered.append(label)
+        
+        if over_quota:
+            print(f"🎯 {over_quota} candidates held back by domain quotas")
+        print(f"📈 Contacting {len(ordered)} candidates in priority order")
+        return df.loc[ordered]
+
+    def contact_all_candidates(self, method='auto', domain_filter=None, batch_size=None, priority=None):
+        """Contact all candidates, sending through the rate-limited outbound queue.
+        
+        method='async' sends over a pooled asyncio HTTP client instead, when the
+        configured transport is an HTTP one. priority=True (or priority_mode)
+        sends best-scoring candidates first and applies domain_quotas.
+        
+        batch_size is deprecated and ignored: pacing is done by the outbound
+        queue's rate limiter instead of pausing after every batch.
+        """
+        if batch_size is not None:
+            print("⚠️ batch_size is deprecated and ignored; pacing comes from the outbound queue's rate limit")
+        
+        df = self.load_candidates()
+        
+        if df.empty:
+            return
+        
+        self.load_contact_index()
+        df = self.ensure_phone_column(df)
+        df = self.filter_qualified_candidates(df, domain_filter)
+        
+        if self.priority_mode if priority is None else priority:
+            df = self.prioritize_candidates(df)
         
         print(f"📋 Processing {len(df)} qualified candidates")
         
@@ -234,22 +486,106 @@ Looking forward to your response! """
         failed_count = 0
         skipped_count = 0
         
-        for index, row in df.iterrows():
+        outbound = get_outbound_queue()
+        dispatcher = self.create_async_dispatcher() if method == 'async' else None
+        outbox = self.load_outbox() if self.use_outbox and method in ('auto', 'async') else None
+        outbox_states = {}
+        
+        if outbox is not None:
+            interrupted = outbox.recover_interrupted(self.message_type)
+            if interrupted:
+                # Logged as failed sends so the retry schedule backs off and resends them
+                self.log_contact_attempts([
+                    self.build_log_entry(candidate_data, "Auto", "Failed", phone, error_msg=reason)
+                    for key, candidate_data, phone, reason in interrupted
+                ])
+                print(f"⚠️ {len(interrupted)} messages were interrupted mid-send last run; logged as failed for retry")
+            outbox_states = outbox.states(self.message_type, self.template_version)
+        
+        ready = []
+        outcomes = []
+        
+        for position, (index, row) in enumerate(df.iterrows(), 1):
             candidate_data = row.to_dict()
             
             print(f"\n{'='*70}")
-            print(f"📋 Candidate {index + 1}/{len(df)}")
+            print(f"📋 Candidate {position}/{len(df)}")
+            
+            outbox_state = outbox_states.get(candidate_data.get('email', ''))
+            if outbox_state == 'sent':
+                print(f"⏭️ Already sent (outbox), skipping...")
+                outcomes.append((True, "Already contacted"))
+                continue
+            if outbox_state == 'failed':
+                print(f"🔁 Previous send failed, leaving it for retry_failed_contacts")
+                outcomes.append((False, "Awaiting retry"))
+                continue
+            if outbox_state == 'queued':
+                print(f"📬 Queued by an earlier run, sending with this batch")
+                continue
+            
+            formatted_phone, payload = self.prepare_contact(candidate_data, method)
+            
+            if formatted_phone is None:
+                outcomes.append(payload)
+            elif method in ('auto', 'async'):
+                ready.append((candidate_data, formatted_phone, payload))
+            else:
+                outcomes.append(self.complete_contact(candidate_data, method, formatted_phone, payload))
+        
+        if outbox is not None:
+            outbox.enqueue_many(ready, self.message_type, self.template_version)
+            # Includes messages queued by an earlier run that stopped before sending them
+            to_send = outbox.queued(self.message_type)
+            before_send = outbox.claim
+        else:
+            to_send = [(key, candidate_data, phone, message) for key, (candidate_data, phone, message) in enumerate(ready)]
+            before_send = None
+        
+        pending = {key: (candidate_data, phone, message) for key, candidate_data, phone, message in to_send}
+        
+        def finish(key, success, result):
+            candidate_data, formatted_phone, full_message = pending[key]
+            if result == "Skipped before sending":
+                outcomes.append((True, "Already contacted"))
+                return
             
-            success, result = self.contact_candidate(candidate_data, method)
+            # The logged outcome decides the outbox state, so a manual fallback
+            # counts as sent instead of waiting for a retry that never comes
+            outcome = self.complete_contact(candidate_data, 'auto', formatted_phone, full_message, (success, result))
+            if outbox is not None:
+                if outcome[0]:
+                    outbox.mark_sent(key, outcome[1])
+                else:
+                    outbox.mark_failed(key, outcome[1])
+            outcomes.append(outcome)
+        
+        if dispatcher is not None and pending:
+            print(f"\n📤 Sending {len(pending)} messages asynchronously ({dispatcher.concurrency} concurrent)...")
+            jobs = [(key, phone, message) for key, (_, phone, message) in pending.items()]
+            dispatcher.run(jobs, finish, before_send)
+        
+        elif pending:
+            print(f"\n📤 Sending {len(pending)} messages via {outbound.transport.name} ({outbound.workers} sender(s))...")
+            
+            futures = {}
+            for key, (_, phone, message) in pending.items():
+                claim = (lambda key=key: before_send(key)) if before_send else None
+                futures[outbound.submit(phone, message, before_send=claim)] = key
             
+            for future in as_completed(futures):
+                success, result = future.result()
+                finish(futures[future], success, result)
+        
+        awaiting_retry_count = 0
+        for success, result in outcomes:
             if success:
                 if result == "Already contacted":
                     skipped_count += 1
                 else:
                     contacted_count += 1
-                    if method == 'auto' and contacted_count % batch_size == 0:
-                        print(f"⏸️ Batch of {batch_size} completed, pausing for {self.delay_between_messages} seconds...")
-                        time.sleep(self.delay_between_messages)
+            elif result == "Awaiting retry":
+                awaiting_retry_count += 1
             else:
                 failed_count += 1
         
@@ -257,30 +593,177 @@ Looking forward to your response! """
         print(f"✅ Successfully contacted: {contacted_count}")
         print(f"⏭️ Already contacted (skipped): {skipped_count}")
         print(f"❌ Failed contacts: {failed_count}")
+        if awaiting_retry_count:
+            print(f"🔁 Awaiting retry (earlier failures): {awaiting_retry_count}")
         print(f"📊 Total processed: {len(df)}")
 
+    def export_manual_links(self, domain_filter=None, csv_path="data/whatsapp_manual_links.csv",
+                            html_path="data/whatsapp_manual_links.html"):
+        """Render every qualifying candidate's message and WhatsApp link in one pass.
+        
+        Writes a CSV and a self-contained HTML click-through page, and logs all
+        attempts with a single append to the contact log.
+        """
+        df = self.load_candidates()
+        
+        if df.empty:
+            return
+        
+        index = self.load_contact_index()
+        df = self.ensure_phone_column(df)
+        df = self.filter_qualified_candidates(df, domain_filter)
+        
+        contacted = index.view('contacted')
+        df = df[[not contacted.contains(email) for email in df['email']]]
+        
+        if df.empty:
+            print("✅ All qualifying candidates have already been contacted")
+            return
+        
+        df = df.assign(phone=self.format_phones_batch(df['phone']))
+        has_phone = df['phone'].notna()
+        with_phone = df[has_phone]
+        without_phone = df[~has_phone]
+        
+        # The intro and questions are the same for everyone, so encode them once;
+        # percent-encoding is per character, so the pieces can be concatenated
+        body = f"\n\n{self.company_intro}\n\n{self.interview_questions}"
+        encoded_body = urllib.parse.quote(body, safe='')
+        names = with_phone['name'].fillna('Candidate').astype(str).tolist()
+        phones = with_phone['phone'].astype(str).tolist()
+        
+        messages = [f"Hi {name}! 👋{body}" for name in names]
+        links = [
+            f"https://web.whatsapp.com/send?phone={phone}&text={urllib.parse.quote(f'Hi {name}! 👋', safe='')}{encoded_body}"
+            for name, phone in zip(names, phones)
+        ]
+        
+        export_df = pd.DataFrame({
+            'name': names,
+            'email': with_phone['email'].tolist(),
+            'domain': with_phone['domain'].tolist(),
+            'phone': phones,
+            'message': messages,
+            'whatsapp_link': links
+        })
+        if not export_df.empty:
+            export_df.to_csv(csv_path, index=False)
+            self.write_manual_links_page(export_df, html_path)
+        
+        log_entries = [
+            self.build_log_entry(candidate, "Manual", "Success", phone, link)
+            for candidate, phone, link in zip(with_phone.to_dict('records'), phones, links)
+        ]
+        log_entries += [
+            self.build_log_entry(candidate, "Manual", "No phone found", error_msg="No valid phone number extracted from CV")
+            for candidate in without_phone.to_dict('records')
+        ]
+        self.log_contact_attempts(log_entries)
+        
+        print(f"✅ Exported {len(export_df)} WhatsApp links to {csv_path} and {html_path}")
+        print(f"❌ No phone number: {len(without_phone)} candidates")
+
+    def write_manual_links_page(self, export_df, html_path):
+        """Write a self-contained HTML page with one click-through link per candidate"""
+        rows = "\n".join(
+            f'<tr><td>{html.escape(name)}</td><td>{html.escape(str(domain))}</td><td>{html.escape(phone)}</td>'
+            f'<td><a href="{html.escape(link)}" target="_blank" rel="noopener">Open chat</a></td></tr>'
+            for name, domain, phone, link in zip(
+                export_df['name'], export_df['domain'], export_df['phone'], export_df['whatsapp_link']
+            )
+        )
+        
+        page = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>CodeCelix WhatsApp Outreach</title>
+<style>
+    body {{ font-family: Arial, sans-serif; margin: 20px; }}
+    table {{ border-collapse: collapse; width: 100%; }}
+    th, td {{ border: 1px solid #ddd; padding: 6px 10px; text-align: left; }}
+    tr.opened {{ background-color: #e8f5e9; }}
+</style>
+</head>
+<body>
+<h2>WhatsApp Outreach ({len(export_df)} candidates)</h2>
+<p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}. Opened chats are highlighted.</p>
+<table>
+<tr><th>Name</th><th>Domain</th><th>Phone</th><th>Link</th></tr>
+{rows}
+</table>
+<script>
+document.querySelectorAll('a').forEach(function (link) {{
+    link.addEventListener('click', function () {{ link.closest('tr').className = 'opened'; }});
+}});
+</script>
+</body>
+</html>
+"""
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(page)
+
     def retry_failed_contacts(self):
-        """Retry contacting candidates who failed in previous attempts"""
-        if not os.path.exists(self.contact_log_csv):
-            print("❌ No contact log found")
+        """Retry failed contacts that are due under their failure class's retry policy"""
+        index = self.load_contact_index()
+        scheduler = self.retry_scheduler
+        due_emails = scheduler.due()
+        
+        if not due_emails:
+            scheduled, given_up = scheduler.summary()
+            print("✅ No failed contacts due for retry")
+            if scheduled:
+                next_due = datetime.fromtimestamp(scheduler.next_due()).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"⏰ {sum(scheduled.values())} scheduled, next retry due at {next_due}")
+            if given_up:
+                print(f"🚫 {given_up} candidates will not be retried (no phone or attempts exhausted)")
             return
         
-        log_df = pd.read_csv(self.contact_log_csv)
-        failed_contacts = log_df[log_df['status'] != 'Success']['email'].unique()
+        print(f"🔄 Retrying {len(due_emails)} failed contacts that are due")
         
-        if len(failed_contacts) == 0:
-            print("✅ No failed contacts to retry")
+        df = self.ensure_phone_column(self.load_candidates())
+        if df.empty:
             return
         
-        print(f"🔄 Retrying {len(failed_contacts)} failed contacts")
+        retry_candidates = df[df['email'].isin(due_emails)].drop_duplicates('email', keep='last')
         
-        df = self.load_candidates()
-        retry_candidates = df[df['email'].isin(failed_contacts)]
+        with index.transaction() as conn:
+            for email in set(due_emails) - set(retry_candidates['email']):
+                scheduler.resolve(conn, email)
+        
+        outbox = self.load_outbox() if self.use_outbox else None
         
-        for index, row in retry_candidates.iterrows():
+        for index_label, row in retry_candidates.iterrows():
             candidate_data = row.to_dict()
             print(f"\n🔄 Retrying: {candidate_data['name']}")
-            self.contact_candidate(candidate_data, method='auto')
+            
+            # Move a failed outbox message back through sending, so a crash mid-retry is recovered again
+            key = MessageOutbox.make_key(candidate_data['email'], self.message_type, self.template_version)
+            claimed = outbox is not None and outbox.requeue(key) and outbox.claim(key)
+            
+            # Outcome after complete_contact, so a manual fallback is marked sent
+            success, result = self.contact_candidate(candidate_data, method='auto')
+            
+            if result == "Already contacted":
+                with index.transaction() as conn:
+                    scheduler.resolve(conn, candidate_data['email'])
+            
+            if outbox is not None and (claimed or success):
+                if success:
+                    outbox.mark_sent(key, result)
+                else:
+                    outbox.mark_failed(key, result)
+
+    def get_contact_rollups(self):
+        """Per-domain attempts, successes and success rate from the incremental rollups"""
+        rollup = self.load_contact_index().view('domain')
+        
+        rows = [
+            {'domain': domain, 'attempts': attempts, 'successes': successes,
+             'success_rate': (successes / attempts) * 100 if attempts > 0 else 0}
+            for domain, (attempts, successes) in rollup.groups.items()
+        ]
+        return pd.DataFrame(rows, columns=['domain', 'attempts', 'successes', 'success_rate'])
 
     def show_contact_stats(self):
         """Show detailed contact statistics"""
@@ -288,31 +771,30 @@ Looking forward to your response! """
             print("📊 No contact log found yet.")
             return
         
-        df = pd.read_csv(self.contact_log_csv)
+        rollup = self.load_contact_index().view('domain')
+        total, successful = rollup.totals()
         
         print("\n📈 Contact Statistics:")
         print("="*50)
-        print(f"Total contact attempts: {len(df)}")
-        print(f"Successful contacts: {len(df[df['message_sent'] == 'Yes'])}")
-        print(f"Failed contacts: {len(df[df['message_sent'] == 'No'])}")
+        print(f"Total contact attempts: {total}")
+        print(f"Successful contacts: {successful}")
+        print(f"Failed contacts: {total - successful}")
         
-        success_rate = (len(df[df['message_sent'] == 'Yes']) / len(df)) * 100 if len(df) > 0 else 0
+        success_rate = (successful / total) * 100 if total > 0 else 0
         print(f"Success rate: {success_rate:.1f}%")
         
         print("\n🎯 Success by Domain:")
-        for domain in df['domain'].unique():
-            domain_df = df[df['domain'] == domain]
-            successful = len(domain_df[domain_df['message_sent'] == 'Yes'])
-            total = len(domain_df)
-            rate = (successful / total) * 100 if total > 0 else 0
-            print(f"   {domain}: {successful}/{total} ({rate:.1f}%)")
+        for _, row in self.get_contact_rollups().iterrows():
+            print(f"   {row['domain']}: {row['successes']}/{row['attempts']} ({row['success_rate']:.1f}%)")
         
         print("\n❌ Common Failure Reasons:")
-        failed_df = df[df['message_sent'] == 'No']
-        if not failed_df.empty:
-            failure_reasons = failed_df['error_message'].value_counts()
-            for reason, count in failure_reasons.head(5).items():
-                print(f"   {reason}: {count} cases")
+        for reason, count in rollup.reason_counts()[:5]:
+            print(f"   {reason}: {count} cases")
+        
+        if self.use_outbox and os.path.exists(self.outbox_db):
+            print("\n📦 Outbox:")
+            for state, count in sorted(self.load_outbox().counts(self.message_type).items()):
+                print(f"   {state}: {count}")
 
     def export_contact_list(self):
         """Export successfully contacted candidates for follow-up"""
@@ -320,15 +802,12 @@ Looking forward to your response! """
             print("❌ No contact log found")
             return
         
-        log_df = pd.read_csv(self.contact_log_csv)
-        successful_contacts = log_df[log_df['message_sent'] == 'Yes'].copy()
+        latest_contacts = self.load_contact_state_index().view('successful_contact').frame()
         
-        if successful_contacts.empty:
+        if latest_contacts.empty:
             print("❌ No successful contacts found")
             return
         
-        latest_contacts = successful_contacts.groupby('email').last().reset_index()
-        
         export_file = "data/contacted_candidates_list.csv"
         latest_contacts.to_csv(export_file, index=False)
         
@@ -345,8 +824,11 @@ if __name__ == "__main__":
     print("4. Show contact statistics")
     print("5. Export contacted candidates list")
     print("6. Test single candidate contact")
+    print("7. Rebuild contact index")
+    print("8. Export manual WhatsApp links (bulk)")
+    print("9. Contact all candidates (priority order)")
     
-    choice = input("\nEnter your choice (1-6): ")
+    choice = input("\nEnter your choice (1-9): ")
     
     if choice == "1":
         whatsapp_system.contact_all_candidates(method='auto')
@@ -378,5 +860,14 @@ if __name__ == "__main__":
             candidate = df.iloc[0].to_dict()
             whatsapp_system.contact_candidate(candidate, method='auto')
     
+    elif choice == "7":
+        whatsapp_system.rebuild_contact_index()
+    
+    elif choice == "8":
+        whatsapp_system.export_manual_links()
+    
+    elif choice == "9":
+        whatsapp_system.contact_all_candidates(method='auto', priority=True)
+    
     else:
         print("Invalid choice. Exiting...")
\ No newline at end of file
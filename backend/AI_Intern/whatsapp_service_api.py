@@ -1,5 +1,6 @@
 from flask import Flask, request, jsonify
 import os
+import hmac
 # Import your workflow classes
 from gmail_cv_scanner import GmailCVScanner
 from cv_domain_detector import CVDomainDetector
@@ -7,6 +8,7 @@ from whatsapp_contact_system import WhatsAppContactSystem
 from interview_questions_generator import InterviewQuestionsGenerator
 from admin_notification_system import AdminNotificationSystem
 from shortlist_group_invite import ShortlistGroupInvite
+from reply_ingestor import CandidateReplyIngestor
 
 app = Flask(__name__)
 
@@ -17,6 +19,7 @@ whatsapp_system = WhatsAppContactSystem()
 interview_generator = InterviewQuestionsGenerator()
 admin_notifier = AdminNotificationSystem()
 shortlist_inviter = ShortlistGroupInvite()
+reply_ingestor = CandidateReplyIngestor()
 
 # -------------------------------
 # Endpoint 1: Full Workflow
@@ -106,5 +109,41 @@ def send_invite():
         return jsonify({"error": str(e)}), 500
 
 
+# -------------------------------
+# Endpoint 3: Candidate Reply Webhook
+# -------------------------------
+@app.route("/webhook/replies", methods=["GET"])
+def verify_replies_webhook():
+    # WhatsApp Cloud API subscription handshake; refused outright if no token is configured
+    verify_token = os.getenv("WHATSAPP_VERIFY_TOKEN")
+    if (verify_token and request.args.get("hub.mode") == "subscribe" and
+            hmac.compare_digest(request.args.get("hub.verify_token", ""), verify_token)):
+        return request.args.get("hub.challenge", ""), 200
+    return jsonify({"error": "Verification failed"}), 403
+
+
+@app.route("/webhook/replies", methods=["POST"])
+def receive_replies():
+    try:
+        if not reply_ingestor.verify_request(request.get_data(), request.headers):
+            return jsonify({"error": "Invalid signature"}), 403
+
+        data = request.get_json(silent=True)
+        if data is None:
+            return jsonify({"error": "Invalid payload"}), 400
+
+        replies = reply_ingestor.parse_replies(data)
+        matched, unmatched = reply_ingestor.ingest(replies)
+
+        return jsonify({
+            "received": len(replies),
+            "matched": matched,
+            "unmatched": unmatched
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
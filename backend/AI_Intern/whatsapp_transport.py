@@ -0,0 +1,297 @@
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import urllib.parse
+import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting sends to ``rate_per_minute``"""
+
+    def __init__(self, rate_per_minute, burst=1):
+        self.rate_per_minute = rate_per_minute
+        self.rate_per_second = rate_per_minute / 60.0 if rate_per_minute else None
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token and return how many seconds the caller must wait before using it"""
+        if self.rate_per_second is None:
+            return 0.0
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+            self.updated = now
+            self.tokens -= 1
+
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate_per_second
+
+    def acquire(self):
+        """Block until a token is available"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class WhatsAppTransport:
+    """Base class for anything that can deliver a WhatsApp text message"""
+
+    name = "base"
+    default_rate_per_minute = 20
+    default_workers = 1
+
+    def send(self, phone, message):
+        """Send a message; returns (success, result)"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class BrowserTransport(WhatsAppTransport):
+    """Opens a prefilled WhatsApp Web chat in the default browser"""
+
+    name = "browser"
+    default_rate_per_minute = 20
+    default_workers = 1
+
+    def build_link(self, phone, message):
+        encoded_message = urllib.parse.quote(message, safe='')
+        return f"https://web.whatsapp.com/send?phone={phone}&text={encoded_message}"
+
+    def send(self, phone, message):
+        try:
+            webbrowser.open(self.build_link(phone, message))
+            return True, "WhatsApp web opened successfully"
+        except Exception as error:
+            return False, f"Failed to open WhatsApp: {error}"
+
+
+class CloudAPITransport(WhatsAppTransport):
+    """Sends text messages through a WhatsApp Cloud API style HTTP endpoint"""
+
+    name = "cloud_api"
+    default_rate_per_minute = 600
+    default_workers = 8
+
+    def __init__(self, access_token, phone_number_id, api_url="https://graph.facebook.com/v19.0", timeout=10):
+        self.access_token = access_token
+        self.phone_number_id = phone_number_id
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {access_token}"})
+
+    @property
+    def messages_url(self):
+        return f"{self.api_url}/{self.phone_number_id}/messages"
+
+    def build_payload(self, phone, message):
+        return {
+            "messaging_product": "whatsapp",
+            "to": phone,
+            "type": "text",
+            "text": {"body": message}
+        }
+
+    def send(self, phone, message):
+        try:
+            response = self.session.post(
+                self.messages_url, json=self.build_payload(phone, message), timeout=self.timeout
+            )
+            if response.status_code >= 400:
+                return False, f"HTTP {response.status_code}: {response.text[:200]}"
+
+            data = response.json() if response.content else {}
+            message_ids = [item.get('id') for item in data.get('messages', [])]
+            return True, message_ids[0] if message_ids else "Message accepted"
+        except Exception as error:
+            return False, f"Failed to send via WhatsApp API: {error}"
+
+    def close(self):
+        self.session.close()
+
+
+class MockTransport(WhatsAppTransport):
+    """In-process transport for tests and rehearsals; records every message"""
+
+    name = "mock"
+    default_rate_per_minute = None
+    default_workers = 4
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, phone, message):
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.failure_rate and random.random() < self.failure_rate:
+            return False, "Mock transport failure"
+
+        with self.lock:
+            self.sent.append((phone, message))
+            return True, f"mock-{len(self.sent)}"
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class MockMessagingServer:
+    """Local HTTP server that accepts Cloud-API-style message requests (for benchmarks)"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.latency = latency
+        self.received = 0
+        self.lock = threading.Lock()
+        self.server = _MockHTTPServer((host, port), self._handler_class())
+        self.thread = None
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Buffer the response so headers and body go out in one segment
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+
+                if mock.latency:
+                    time.sleep(mock.latency)
+
+                with mock.lock:
+                    mock.received += 1
+                    message_id = f"wamid.mock{mock.received}"
+
+                body = json.dumps({"messages": [{"id": message_id}]}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def api_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+TRANSPORTS = {
+    BrowserTransport.name: BrowserTransport,
+    CloudAPITransport.name: CloudAPITransport,
+    MockTransport.name: MockTransport,
+}
+
+
+def create_transport(settings=None):
+    """Build a transport from a config dict such as {"type": "cloud_api", "access_token": ...}"""
+    settings = dict(settings or {})
+    transport_type = settings.pop("type", BrowserTransport.name)
+    for key in ("rate_per_minute", "burst", "workers"):
+        settings.pop(key, None)
+
+    if transport_type not in TRANSPORTS:
+        raise ValueError(f"Unknown WhatsApp transport: {transport_type}")
+
+    return TRANSPORTS[transport_type](**settings)
+
+
+class OutboundQueue:
+    """Rate-limited outbound message queue with N concurrent senders"""
+
+    def __init__(self, transport=None, rate_per_minute=None, burst=1, workers=None):
+        self.transport = transport or BrowserTransport()
+
+        if rate_per_minute is None:
+            rate_per_minute = self.transport.default_rate_per_minute
+        self.rate_limiter = TokenBucket(rate_per_minute, burst)
+
+        self.workers = workers or self.transport.default_workers
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="whatsapp-sender")
+
+    def _deliver(self, phone, message, before_send=None):
+        self.rate_limiter.acquire()
+        if before_send is not None and not before_send():
+            return False, "Skipped before sending"
+        try:
+            return self.transport.send(phone, message)
+        except Exception as error:
+            return False, f"Transport error: {error}"
+
+    def submit(self, phone, message, before_send=None):
+        """Queue a message; returns a Future resolving to (success, result).
+        
+        before_send() runs on the sender thread right before delivery; if it
+        returns False the message is not sent.
+        """
+        return self.executor.submit(self._deliver, phone, message, before_send)
+
+    def send(self, phone, message):
+        """Queue a message and wait for its result"""
+        return self.submit(phone, message).result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        self.transport.close()
+
+
+_shared_queue = None
+_shared_lock = threading.Lock()
+
+
+def get_outbound_queue():
+    """Process-wide queue shared by every module that sends WhatsApp messages"""
+    global _shared_queue
+    with _shared_lock:
+        if _shared_queue is None:
+            _shared_queue = OutboundQueue()
+        return _shared_queue
+
+
+def configure_outbound_queue(transport=None, rate_per_minute=None, burst=1, workers=None):
+    """Replace the shared queue, e.g. to switch transport or change the rate limit"""
+    global _shared_queue
+    with _shared_lock:
+        previous = _shared_queue
+        _shared_queue = OutboundQueue(transport, rate_per_minute, burst, workers)
+
+    if previous is not None:
+        previous.shutdown()
+    return _shared_queue